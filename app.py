@@ -6,15 +6,22 @@ from autogen_ext.models.ollama import OllamaChatCompletionClient
 from autogen_agentchat.agents import AssistantAgent
 from autogen_agentchat.conditions import MaxMessageTermination, TextMentionTermination
 from autogen_agentchat.teams import SelectorGroupChat
-import asyncio
+from autogen_agentchat.messages import ModelClientStreamingChunkEvent
 import os
+import uuid
 from dotenv import load_dotenv
-from autogen_ext.tools.langchain import LangChainToolAdapter
-from langchain_community.document_loaders import WebBaseLoader
-from langchain.tools import Tool  # Import the Tool class
 import streamlit as st
-from bs4 import BeautifulSoup
-import re
+from tools import fetch_cache
+from async_fetch import fetcher
+from document_store import DocumentStore, document_tools
+from pipeline import create_pipeline_team, selector_calls_saved
+from instrumentation import RunRecorder, SELECTOR
+from completion_cache import CACHE_MODES, with_completion_cache
+from jobs import JobRunner
+from scheduler import SchedulingChatCompletionClient, create_scheduled_client
+from model_tiers import TIERS, create_role_clients
+from checkpoint import CheckpointStore, Checkpointer
+from faq_validation import RepairRouter, SchemaValidatorAgent, ValidFAQTermination, faq_sources
 from streamlit_avatar import avatar
 
 
@@ -29,124 +36,221 @@ load_dotenv()
 # Sidebar selector to choose model  
 model_choice = st.sidebar.selectbox(  
     "Select your model:",  
-    ["Gemini", "Azure", "Ollama"] ,
+    ["Gemini", "Azure", "Ollama", "Provider pool"] ,
      
 )  
   
-# Initialize model_client based on selection  
-if model_choice == "Azure":  
-    token_provider = AzureTokenProvider(  
-        DefaultAzureCredential(),  
-        "https://cognitiveservices.azure.com/.default",  
-    )  
-    model_client = AzureOpenAIChatCompletionClient(  
-        azure_deployment=os.getenv("OPENAI_API_MODEL"),
-        model=os.getenv("OPENAI_API_MODEL"),  
-        api_version=os.getenv("OPENAI_API_VERSION"),
-        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),  
-        api_key=os.getenv("AZURE_OPENAI_KEY")  
-    )  
-elif model_choice == "Gemini":  
-    model_client = OpenAIChatCompletionClient(  
-        model="gemini-2.0-flash",  
-        api_key=os.getenv("GEMINI_API_KEY"),  
-        api_type="gemini",  
-    )  
-elif model_choice == "Ollama":  
-    model_client = OllamaChatCompletionClient(  
-        model="llama3.2:1b",  
-    )  
-  
-st.sidebar.write(f"Current model: **{model_choice}**")  
-
-def fetch_url_text_tool(url: str) -> str:from bs4 import BeautifulSoup
-import re
-
-def clean_text(text: str) -> str:
-    """Remove unnecessary characters and whitespace."""
-    text = re.sub(r'\s+', ' ', text)  # Normalize whitespace
-    return text.strip()
-
-def fetch_url_text_tool(url: str) -> str:
-    """Fetch the main text content from a webpage and clean it."""
-    try:
-        loader = WebBaseLoader(url)
-        docs = loader.load()
-        
-        if docs and docs[0].page_content.strip():
-            # Use BeautifulSoup to strip out HTML tags
-            soup = BeautifulSoup(docs[0].page_content, "html.parser")
-            main_text = soup.get_text()
-            
-            return clean_text(main_text)
-        else:
-            return "Error: No content found at the provided URL."
-    except Exception as e:
-        return f"Error: Failed to fetch content from the URL. Details: {str(e)}"
-
-
-# Wrap the function in a LangChain Tool
-fetch_url_text_tool_wrapped = Tool(
-    name="fetch_url_text",
-    func=fetch_url_text_tool,
-    description="Fetch the main text content from a webpage."
+# Sidebar selector for the completion cache: record reuses answers, replay never calls the model
+cache_mode = st.sidebar.selectbox(
+    "Completion cache:",
+    CACHE_MODES,
+    index=CACHE_MODES.index(os.getenv("COMPLETION_CACHE_MODE", "passthrough")),
 )
 
 
-fetch_url_text = LangChainToolAdapter(fetch_url_text_tool_wrapped)
+# Model clients, and the Azure credential behind them, are created once per process for each selection
+@st.cache_resource(show_spinner=False)
+def get_model_client(model_choice, cache_mode):
+    # Initialize model_client based on selection  
+    if model_choice == "Azure":  
+        token_provider = AzureTokenProvider(  
+            DefaultAzureCredential(),  
+            "https://cognitiveservices.azure.com/.default",  
+        )  
+        model_client = AzureOpenAIChatCompletionClient(  
+            azure_deployment=os.getenv("OPENAI_API_MODEL"),
+            model=os.getenv("OPENAI_API_MODEL"),  
+            api_version=os.getenv("OPENAI_API_VERSION"),
+            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),  
+            api_key=os.getenv("AZURE_OPENAI_KEY")  
+        )  
+    elif model_choice == "Gemini":  
+        model_client = OpenAIChatCompletionClient(  
+            model="gemini-2.0-flash",  
+            api_key=os.getenv("GEMINI_API_KEY"),  
+            api_type="gemini",  
+        )  
+    elif model_choice == "Ollama":  
+        model_client = OllamaChatCompletionClient(  
+            model="llama3.2:1b",  
+        )  
+    elif model_choice == "Provider pool":
+        # Rate-limited pool of the MODEL_PROVIDERS with retries, failover and optional hedging
+        model_client = create_scheduled_client()
+    return with_completion_cache(model_client, cache_mode)
 
-project_planner = AssistantAgent(
-    name="ProjectPlanner",
-    model_client=model_client,
-    description="An agent for planning tasks, this agent should be the first to engage when given a new task.",
-    system_message="""
-    You are a planning agent.
-    You only plan and delegate tasks - you do not execute them yourself. You can engage team members multiple times so that a perfect Joke is provided.
-    Your team members are CrawlerAgent, indexer, FAQ_generator, and verifier.    
-    After assigning tasks, wait for responses from the agents, handover tasks between agents, and ensure all subtasks are completed. After all tasks are complete, summarize the findings and end with "TERMINATE". Do not mention "TERMINATE" before that.
-    """           
-)
 
+st.sidebar.write(f"Current model: **{model_choice}**")  
 
-crawler = AssistantAgent(
-    name="CrawlerAgent",
-    model_client=model_client,
-    system_message="You are responsible for extracting useful text from a given URL using the fetch_url_text tool. ",
-    tools=[fetch_url_text]  # 👈 tool added here
-)
+if model_choice == "Provider pool":
+    scheduled_client = get_model_client(model_choice, cache_mode)
+    # Look through the completion cache wrapper, if any
+    while not isinstance(scheduled_client, SchedulingChatCompletionClient):
+        scheduled_client = scheduled_client.inner
+    metrics = scheduled_client.metrics()
+    st.sidebar.caption(f"Provider queue depth: {metrics['queue_depth']}")
+    for name, m in metrics["providers"].items():
+        st.sidebar.caption(f"{name}: {m['calls']} calls, {m['rate_limited']} rate limited, p50 {m['p50_ms']} ms, p99 {m['p99_ms']} ms")
 
-indexer = AssistantAgent(
-    name="IndexerAgent",
-    model_client=model_client,
-    system_message="You organize content into tagged categories and prepare it for Q&A generation. "
+st.sidebar.caption(
+    "Fetch cache: {hits} hits, {misses} misses, {revalidated} revalidated".format(**fetch_cache.stats())
 )
 
-FAQ_generator = AssistantAgent(
-    name="FAQGeneratorAgent",
-    model_client=model_client,
-    system_message="You generate helpful Q&A pairs for each category. "
+# Sidebar toggle for token-by-token rendering of agent replies
+stream_tokens = st.sidebar.toggle("Stream tokens", value=True)
+# Seconds between UI polls of a running job; streamed tokens are batched into these updates
+JOB_POLL_SECONDS = 0.25
+
+# Sidebar selector to choose how the next speaker is picked
+team_mode = st.sidebar.radio(
+    "Team mode:",
+    ["Selector", "Fixed pipeline"],
+    help="Fixed pipeline runs Crawler → Indexer → FAQ generator → Verifier without a model call per turn.",
 )
 
-verifier = AssistantAgent(
-    name="VerifierAgent",
-    model_client=model_client,
-    system_message="You polish, deduplicate, and validate the final Q&A content. "
+# Sidebar selector to move routing and support roles onto a smaller model
+tier_choice = st.sidebar.selectbox(
+    "Model tiering:",
+    list(TIERS),
+    index=list(TIERS).index(os.getenv("MODEL_TIERS", "single")) if os.getenv("MODEL_TIERS", "single") in TIERS else 0,
+    help="Roles listed in the tier run on the small model; FAQ generation always uses the model selected above.",
 )
 
 
+@st.cache_resource(show_spinner=False)
+def get_role_clients(tier_choice, cache_mode):
+    return create_role_clients(TIERS[tier_choice], cache_mode)
 
-# Define a termination condition that stops the task if the critic approves.
-text_mention_termination = TextMentionTermination("TERMINATE")
-max_messages_termination = MaxMessageTermination(max_messages=10)
-termination = text_mention_termination | max_messages_termination
 
-team = SelectorGroupChat(
-    [project_planner, crawler, indexer, FAQ_generator, verifier],    
-    termination_condition=termination,
-    model_client=model_client,
-    allow_repeated_speaker=True,  
-)
+def create_team(model_client, recorder, stream_tokens, team_mode, role_clients=None, checkpointer=None):
+    """Build the five agents and their team, with every model call instrumented by `recorder`.
+
+    `role_clients` moves individual agents (and the selector) off `model_client`, e.g. onto a small local model.
+    `checkpointer` saves the team's state before every turn so a cancelled or crashed run can be resumed.
+
+    Crawled pages go into the team's DocumentStore; agents see a handle and summary and read sections on demand.
+    """
+    documents = DocumentStore()
+    if checkpointer is not None:
+        checkpointer.documents = documents
+    fetch_document, retrieval_tools = document_tools(documents)
+
+    def client_for(role):
+        return recorder.wrap((role_clients or {}).get(role, model_client), role)
+
+    project_planner = AssistantAgent(
+        name="ProjectPlanner",
+        model_client=client_for("ProjectPlanner"),
+        model_client_stream=stream_tokens,
+        description="An agent for planning tasks, this agent should be the first to engage when given a new task.",
+        system_message="""
+        You are a planning agent.
+        You only plan and delegate tasks - you do not execute them yourself. You can engage team members multiple times so that a perfect Joke is provided.
+        Your team members are CrawlerAgent, indexer, FAQ_generator, and verifier.    
+        After assigning tasks, wait for responses from the agents, handover tasks between agents, and ensure all subtasks are completed. After all tasks are complete, summarize the findings and end with "TERMINATE". Do not mention "TERMINATE" before that.
+        """           
+    )
+
+
+    crawler = AssistantAgent(
+        name="CrawlerAgent",
+        model_client=client_for("CrawlerAgent"),
+        model_client_stream=stream_tokens,
+        system_message="You are responsible for extracting useful text from a given URL using the fetch_document tool. "
+                       "It stores the page and returns a document handle with a summary; pass the handle on, not the page text. ",
+        tools=[fetch_document]  # 👈 tool added here
+    )
+
+    indexer = AssistantAgent(
+        name="IndexerAgent",
+        model_client=client_for("IndexerAgent"),
+        model_client_stream=stream_tokens,
+        system_message="You organize content into tagged categories and prepare it for Q&A generation. "
+                       "Read the stored page with read_section and search_document using its document handle, and list the section numbers each category draws on. ",
+        tools=retrieval_tools,
+        reflect_on_tool_use=True,
+    )
+
+    FAQ_generator = AssistantAgent(
+        name="FAQGeneratorAgent",
+        model_client=client_for("FAQGeneratorAgent"),
+        model_client_stream=stream_tokens,
+        system_message="You generate helpful Q&A pairs for each category. "
+                       "Read the sections listed for each category with read_section (or search_document) using the document handle. ",
+        tools=retrieval_tools,
+        reflect_on_tool_use=True,
+    )
+
+    verifier = AssistantAgent(
+        name="VerifierAgent",
+        model_client=client_for("VerifierAgent"),
+        model_client_stream=stream_tokens,
+        system_message="You polish, deduplicate, and validate the final Q&A content. "
+                       "Reply with only the final JSON array of categories. "
+    )
 
+    agents = [project_planner, crawler, indexer, FAQ_generator, SchemaValidatorAgent(), verifier]
+    if team_mode == "Fixed pipeline":
+        return create_pipeline_team(agents, client_for(SELECTOR), checkpointer=checkpointer)
+
+    # Define a termination condition that stops the task if the critic approves.
+    text_mention_termination = TextMentionTermination("TERMINATE")
+    max_messages_termination = MaxMessageTermination(max_messages=10)
+    # ...or as soon as the verifier replies with FAQ JSON that passes the schema
+    valid_faq_termination = ValidFAQTermination(faq_sources([agent.name for agent in agents]))
+    termination = valid_faq_termination | text_mention_termination | max_messages_termination
+
+    # The validator is only ever called by the repair router, never picked by the model
+    repair = RepairRouter()
+    team = SelectorGroupChat(
+        agents,    
+        termination_condition=termination,
+        model_client=client_for(SELECTOR),
+        selector_func=checkpointer.selector_func(repair) if checkpointer else repair,
+        candidate_func=repair.candidates([agent.name for agent in agents]),
+        allow_repeated_speaker=True,  
+    )
+    if checkpointer is not None:
+        checkpointer.team = team
+    return team
+
+
+# Checkpoints of every session's runs, shared by the process
+@st.cache_resource
+def get_checkpoint_store() -> CheckpointStore:
+    return CheckpointStore(os.getenv("CHECKPOINT_DB", "output/checkpoints.db"))
+
+
+# Background runner shared by every session; it bounds how many teams are in flight at once. The pooled fetch
+# client lives on its loop, so the runner closes it when Streamlit releases the resource.
+@st.cache_resource(on_release=JobRunner.shutdown)
+def get_job_runner() -> JobRunner:
+    return JobRunner(max_concurrent=int(os.getenv("MAX_CONCURRENT_RUNS", 4)), on_shutdown=[fetcher.aclose])
+
+
+job_runner = get_job_runner()
+if "job_ids" not in st.session_state:
+    st.session_state.job_ids = []
+    # Checkpointed runs this session started, the only ones it offers to resume
+    st.session_state.run_ids = set()
+
+
+def get_session_team():
+    """Return this session's team, reusing it across reruns.
+
+    The team is rebuilt only when a setting it was built from changes, or when its previous run is still
+    in flight (a team can't run twice at once). Each run resets it, so reuse never leaks state between runs.
+    """
+    key = (model_choice, cache_mode, stream_tokens, team_mode, tier_choice)
+    bundle = st.session_state.get("team_bundle")
+    previous_job = job_runner.get(bundle["job_id"]) if bundle and bundle["job_id"] else None
+    if bundle is None or bundle["key"] != key or (previous_job and not previous_job.finished):
+        recorder = RunRecorder()
+        checkpointer = Checkpointer(get_checkpoint_store())
+        team = create_team(get_model_client(model_choice, cache_mode), recorder, stream_tokens, team_mode, get_role_clients(tier_choice, cache_mode), checkpointer)
+        bundle = {"key": key, "team": team, "recorder": recorder, "checkpointer": checkpointer, "job_id": None}
+        st.session_state.team_bundle = bundle
+    return bundle
 
 
 # Streamlit input for task  
@@ -157,7 +261,7 @@ task = f"""
 
     {url}
 
-    Use the fetch_url_text tool to retrieve the content, then analyze it.
+    Use the fetch_document tool to retrieve the content, then analyze it.
 
     Break down into categories and generate Q&A pairs like in json format:
     [
@@ -220,6 +324,13 @@ agent_avatars = [
             "caption": "Polishes and validates the final Q&A content",
             "key": "verifier_agent",
         },
+        {
+            "url": "icons/system_avatar.png",
+            "size": 40,
+            "title": "SchemaValidatorAgent",
+            "caption": "Sends schema errors in the FAQ JSON back for repair",
+            "key": "schema_validator_agent",
+        },
         {
             "url": "icons/system_avatar.png",
             "size": 40,
@@ -236,104 +347,246 @@ agent_avatars = [
         },
     ]
 
+
+
+# Avatar PNGs are read from disk once per process rather than on every rerun
+@st.cache_data(show_spinner=False)
+def load_avatar(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+# Avatar lookup by agent name, built once instead of scanning the list for every message
+avatar_images = {a["title"]: load_avatar(a["url"]) for a in agent_avatars}
+
 st.sidebar.markdown("### Agents and their Roles")
 for agent in agent_avatars:
     # Display the avatar image
-    st.sidebar.image(agent["url"], width=40)
+    st.sidebar.image(avatar_images[agent["title"]], width=40)
     # Display the title and caption
     st.sidebar.markdown(f"**{agent['title']}**: {agent['caption']}") 
 
+async def stream_run(team, task, recorder, checkpointer, run_id, cancellation_token, key="", resume=False):
+    """Job body: reset the reused team (or restore it from the run's last checkpoint when resuming), then run it
+    through the recorder and checkpointer, echoing complete messages to the console."""
+    if resume:
+        await checkpointer.restore(run_id)
+        recorder.reset(run_id)
+        stream = team.run_stream(cancellation_token=cancellation_token)
+    else:
+        await team.reset()
+        recorder.reset(run_id)
+        checkpointer.begin(run_id, key=key, task=task)
+        stream = team.run_stream(task=task, cancellation_token=cancellation_token)
+    async for message in checkpointer.track(recorder.track(stream)):
+        if not isinstance(message, ModelClientStreamingChunkEvent):
+            print(message)
+        yield message
+
+
+def render_messages(messages, team_mode):
+    """Render a job's messages; streamed chunks show as one partial reply until the complete message arrives."""
+    terminated = False
+    # The reply currently being streamed: its sender and text so far
+    streaming = {"source": None, "text": ""}
+    for message in messages:
+        sender = getattr(message, "source", "Unknown")  
+
+        if isinstance(message, ModelClientStreamingChunkEvent):
+            if streaming["source"] != sender:
+                streaming.update(source=sender, text="")
+            streaming["text"] += message.content
+            continue
+        streaming.update(source=None, text="")
+
+        # Handle regular text content  
+        if hasattr(message, "content") and message.content:  
+            content = message.content  
+            if isinstance(content, list):  
+                content = "\n\n".join([str(item).strip() for item in content])  
+            elif isinstance(content, str):  
+                content = content.strip()  
+            else:  
+                content = str(content).strip()  
+
+            # Check for termination  
+            if "TERMINATE" in content:  
+                terminated = True  
+
+            # Display messages with avatars
+            with st.chat_message(sender):
+                avatar_image = avatar_images.get(sender)
+                if avatar_image:
+                    st.image(avatar_image, width=40)
+                st.write(content)
+
+        # Handle tool calls  
+        elif hasattr(message, "tool_calls") and message.tool_calls:  
+            with st.chat_message(sender):  
+                avatar_image = avatar_images.get(sender)
+                if avatar_image:
+                    st.image(avatar_image, width=40)
+                for tool_call in message.tool_calls:  
+                    function_name = tool_call.function.name  
+                    function_args = tool_call.function.arguments  
+                    st.markdown(f"Calling function `{function_name}` with arguments:")  
+                    st.code(function_args, language="json")  
+
+        # Explicitly handle TaskResult messages  
+        elif message.__class__.__name__ == "TaskResult":  
+            terminated = True  
+            with st.chat_message("System"):  
+                avatar_image = avatar_images.get("System")
+                if avatar_image:
+                    st.image(avatar_image, width=40)
+                st.success("✅ Task Completed Successfully!")  
+                st.markdown(f"**Stop reason:** {message.stop_reason}")  
+                if team_mode == "Fixed pipeline":
+                    st.markdown(f"**Selector model calls saved:** {selector_calls_saved(message.messages)}")
+                st.markdown("**Conversation Summary:**")  
+                for msg in message.messages:  
+                    msg_source = getattr(msg, "source", "Unknown")  
+                    msg_content = getattr(msg, "content", "")  
+                    if isinstance(msg_content, list):  
+                        msg_content = "\n\n".join([str(item).strip() for item in msg_content])  
+                    st.markdown(f"- **{msg_source}**: {msg_content}")  
+
+        else:  
+            # Fallback for any other unexpected message types  
+            with st.chat_message("System"):  
+                avatar_image = avatar_images.get("System")
+                if avatar_image:
+                    st.image(avatar_image, width=40)
+                st.warning(f"⚠️ Received an unexpected message type: {message.type}")  
+
+    # A reply that is still streaming
+    if streaming["source"] is not None:
+        with st.chat_message(streaming["source"]):
+            avatar_image = avatar_images.get(streaming["source"])
+            if avatar_image:
+                st.image(avatar_image, width=40)
+            st.markdown(streaming["text"] + " ▌")
+
+    if terminated:  
+        with st.chat_message("System"):  
+            avatar_image = avatar_images.get("System")
+            if avatar_image:
+                st.image(avatar_image, width=40)
+            st.success("✅ Conversation fully completed.")  
+
+
 # Button to start the conversation  
 if st.button("Run task"):  
-    st.write("Running the task...")  
-  
-    # # Define agent avatars  
-    # agent_avatars = {  
-    #     "ProjectPlanner": "👨‍💼",  
-    #     "CrawlerAgent": "💂‍♀️",  
-    #     "IndexerAgent": "👩‍✈️",  
-    #     "FAQGeneratorAgent": "🦸‍♂️",  
-    #     "VerifierAgent": "👩‍🚒",
-    #     "System": "⚙",  
-    #     "Unknown": "❓"  
-    # }  
-  
-    
-    
-    async def run_conversation():  
-        terminated = False  
-        try:  
-            async for message in team.run_stream(task=task):  
-                print(message)  
-    
-                sender = getattr(message, "source", "Unknown")  
-    
-                # Handle regular text content  
-                if hasattr(message, "content") and message.content:  
-                    content = message.content  
-                    if isinstance(content, list):  
-                        content = "\n\n".join([str(item).strip() for item in content])  
-                    elif isinstance(content, str):  
-                        content = content.strip()  
-                    else:  
-                        content = str(content).strip()  
-    
-                    # Check for termination  
-                    if "TERMINATE" in content:  
-                        terminated = True  
-    
-                    # Display messages with avatars
-                    with st.chat_message(sender):
-                        avatar_url = next((a["url"] for a in agent_avatars if a["title"] == sender), None)
-                        if avatar_url:
-                            st.image(avatar_url, width=40)
-                        st.write(content)
-    
-                # Handle tool calls  
-                elif hasattr(message, "tool_calls") and message.tool_calls:  
-                    with st.chat_message(sender):  
-                        avatar_url = next((a["url"] for a in agent_avatars if a["title"] == sender), None)
-                        if avatar_url:
-                            st.image(avatar_url, width=40)
-                        for tool_call in message.tool_calls:  
-                            function_name = tool_call.function.name  
-                            function_args = tool_call.function.arguments  
-                            st.markdown(f"Calling function `{function_name}` with arguments:")  
-                            st.code(function_args, language="json")  
-    
-                # Explicitly handle TaskResult messages  
-                elif message.__class__.__name__ == "TaskResult":  
-                    terminated = True  
-                    with st.chat_message("System"):  
-                        avatar_url = next((a["url"] for a in agent_avatars if a["title"] == "System"), None)
-                        if avatar_url:
-                            st.image(avatar_url, width=40)
-                        st.success("✅ Task Completed Successfully!")  
-                        st.markdown(f"**Stop reason:** {message.stop_reason}")  
-                        st.markdown("**Conversation Summary:**")  
-                        for msg in message.messages:  
-                            msg_source = getattr(msg, "source", "Unknown")  
-                            msg_content = getattr(msg, "content", "")  
-                            if isinstance(msg_content, list):  
-                                msg_content = "\n\n".join([str(item).strip() for item in msg_content])  
-                            st.markdown(f"- **{msg_source}**: {msg_content}")  
-    
-                else:  
-                    # Fallback for any other unexpected message types  
-                    with st.chat_message("System"):  
-                        avatar_url = next((a["url"] for a in agent_avatars if a["title"] == "System"), None)
-                        if avatar_url:
-                            st.image(avatar_url, width=40)
-                        st.warning(f"⚠️ Received an unexpected message type: {message.type}")  
-    
-            if terminated:  
-                with st.chat_message("System"):  
-                    avatar_url = next((a["url"] for a in agent_avatars if a["title"] == "System"), None)
-                    if avatar_url:
-                        st.image(avatar_url, width=40)
-                    st.success("✅ Conversation fully completed.")  
-    
-        except Exception as e:  
-            st.error(f"An error occurred: {e}")  
-    # Execute the async conversation function  
-    asyncio.run(run_conversation())
\ No newline at end of file
+    bundle = get_session_team()
+    run_id = uuid.uuid4().hex[:12]
+    st.session_state.run_ids.add(run_id)
+    job_id = job_runner.submit(
+        lambda token: stream_run(bundle["team"], task, bundle["recorder"], bundle["checkpointer"], run_id, token, key=url),
+        url=url,
+        team_mode=team_mode,
+        run_id=run_id,
+    )
+    bundle["job_id"] = job_id
+    st.session_state.job_ids.append(job_id)
+    st.session_state.selected_job = job_id
+
+
+def resume_run(run_id, run_url):
+    """Continue an interrupted run from its last checkpoint as a new job with the current settings.
+
+    Used as a button callback, since it selects the new job before the run selector is drawn.
+    """
+    if run_id in {job.metadata["run_id"] for job in job_runner.unfinished()}:
+        return
+    bundle = get_session_team()
+    job_id = job_runner.submit(
+        lambda token: stream_run(bundle["team"], None, bundle["recorder"], bundle["checkpointer"], run_id, token, resume=True),
+        url=run_url,
+        team_mode=team_mode,
+        run_id=run_id,
+    )
+    bundle["job_id"] = job_id
+    st.session_state.job_ids.append(job_id)
+    st.session_state.selected_job = job_id
+
+
+# This session's cancelled or failed runs can continue from their last checkpoint (after a server restart,
+# `python checkpoint.py list` shows every interrupted run and `batch.py --resume` continues them)
+# Queued or running jobs of every session are left out, as are other sessions' runs
+active_run_ids = {job.metadata["run_id"] for job in job_runner.unfinished()}
+interrupted_runs = [
+    run for run in get_checkpoint_store().interrupted()
+    if run["run_id"] in st.session_state.run_ids and run["run_id"] not in active_run_ids
+][:10]
+if interrupted_runs:
+    st.sidebar.markdown("### Interrupted runs")
+    for run in interrupted_runs:
+        st.sidebar.caption(f"`{run['run_id']}` {run['status']} after {run['checkpoints']} turns: {run['key']}")
+        st.sidebar.button("Resume", key=f"resume_{run['run_id']}", on_click=resume_run, args=(run["run_id"], run["key"]))
+
+# Sidebar list of this session's runs; any of them can be reopened while others keep running
+if st.session_state.job_ids:
+    st.sidebar.markdown("### Your runs")
+    st.sidebar.caption(f"{job_runner.active()} runs queued or running on the server")
+    job_ids = list(reversed(st.session_state.job_ids))
+    # Labels must not change while a run progresses, or Streamlit would treat the selectbox as a new widget
+    st.sidebar.selectbox(
+        "Show run:",
+        job_ids,
+        key="selected_job",
+        format_func=lambda job_id: f"{job_id} · {job_runner.get(job_id).metadata['url']}" if job_runner.get(job_id) else job_id,
+    )
+    for job_id in job_ids:
+        job = job_runner.get(job_id)
+        st.sidebar.caption(f"`{job_id}`: {job.status if job else 'expired'}")
+
+selected_job = job_runner.get(st.session_state.get("selected_job") or "")
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS if selected_job and not selected_job.finished else None)
+def show_job(job_id):
+    """Poll the job and render its progress; only this fragment reruns while the job is in flight."""
+    job = job_runner.get(job_id)
+    if job is None:
+        return
+    if job_id != st.session_state.get("selected_job"):
+        # Another run was picked from inside the fragment (e.g. resumed); redraw the page for it
+        st.rerun(scope="app")
+    if job.status == "queued":
+        st.info("⏳ Waiting for a free worker...")
+    elif job.status == "running":
+        turns = sum(1 for m in job.messages if getattr(m, "source", None) and not isinstance(m, ModelClientStreamingChunkEvent))
+        st.write(f"Running the task... {turns} messages in {job.elapsed:.0f}s")
+    if not job.finished and st.button("Cancel run"):
+        job_runner.cancel(job_id)
+
+    render_messages(list(job.messages), job.metadata["team_mode"])
+
+    if job.status == "failed":
+        st.error(f"An error occurred: {job.error}")
+    elif job.status == "cancelled":
+        st.warning("Run cancelled.")
+    run_id = job.metadata["run_id"]
+    if job.status in ("failed", "cancelled") and run_id not in {j.metadata["run_id"] for j in job_runner.unfinished()} and any(run["run_id"] == run_id for run in get_checkpoint_store().interrupted()):
+        st.button("Resume run", help="Continue from the last checkpoint instead of starting over.", on_click=resume_run, args=(run_id, job.metadata["url"]))
+    if job.finished and job_id in st.session_state.get("polling_jobs", set()):
+        # Rerun the whole page once so the sidebar picks up the finished run's breakdown
+        st.session_state.polling_jobs.discard(job_id)
+        st.rerun()
+
+
+if selected_job is not None:
+    if not selected_job.finished:
+        st.session_state.setdefault("polling_jobs", set()).add(selected_job.id)
+    show_job(selected_job.id)
+
+    # Per-run latency, token and cost breakdown
+    job_recorder = RunRecorder.from_log(selected_job.metadata["run_id"]) if selected_job.finished else None
+    if job_recorder and job_recorder.records:
+        st.sidebar.markdown("### Run breakdown")
+        st.sidebar.dataframe(job_recorder.summary(), hide_index=True)
+        totals = job_recorder.totals()
+        st.sidebar.caption(
+            f"{totals['model_calls']} model calls, {totals['prompt_tokens']} prompt / {totals['completion_tokens']} "
+            f"completion tokens, ~${totals['cost_usd']:.4f}. Log: `{job_recorder.log_path}`"
+        )
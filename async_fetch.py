@@ -0,0 +1,129 @@
+import os
+import codecs
+import asyncio
+from urllib.parse import urlsplit
+import httpx
+from fetch_cache import FetchCache
+from extract import aextract_text
+from tools import REQUEST_HEADERS, FETCH_MAX_BYTES, FETCH_MAX_CHARS, fetch_cache
+
+
+class AsyncFetcher:
+    """Pooled async page fetcher: one keep-alive httpx client shared by every request, in front of the fetch cache.
+
+    At most `max_per_host` downloads run against one host at a time, so many teams crawling the same site
+    queue politely while crawls of different sites overlap. Bodies are streamed through the text extractor
+    and stop at `max_bytes` / `max_chars`, so an oversized page is truncated rather than read in full.
+    Redirects are followed hop by hop, each hop holding a slot on its own host.
+    The client is created on first use and bound to that event loop. Whoever runs the loop owns it and calls
+    `aclose()` (or uses the fetcher as an async context manager) before the loop ends; a later loop then gets
+    a fresh client.
+    """
+
+    def __init__(self, cache: FetchCache = fetch_cache, max_connections: int = 100, max_keepalive: int = 20,
+                 max_per_host: int = 8, connect_timeout: float = 10.0, read_timeout: float = 30.0,
+                 max_redirects: int = 5, max_bytes: int = FETCH_MAX_BYTES, max_chars: int = FETCH_MAX_CHARS):
+        self.cache = cache
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.max_per_host = max_per_host
+        self.max_redirects = max_redirects
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._host_slots: dict[str, asyncio.Semaphore] = {}
+        self._ssl_context = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._loop is not loop:
+            if not self._loop.is_closed():
+                raise RuntimeError("AsyncFetcher is in use by another event loop; aclose() it there first.")
+            # The owner's loop ended without aclose(); its connections went with it
+            self._client = None
+        if self._client is None:
+            # Loading the CA bundle is the slow part of creating a client, so the SSL context is kept across loops
+            self._ssl_context = self._ssl_context or httpx.create_ssl_context()
+            self._client = httpx.AsyncClient(headers=REQUEST_HEADERS, limits=self.limits, timeout=self.timeout, verify=self._ssl_context)
+            self._loop = loop
+            self._host_slots = {}
+        return self._client
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self.max_per_host)
+        return self._host_slots[host]
+
+    async def download(self, url: str, headers=None):
+        """Download a page and return its cleaned text and response headers, or None text on 304 Not Modified."""
+        client = self.client
+        for _ in range(self.max_redirects + 1):
+            response = await self._download_hop(client, url, headers)
+            if not isinstance(response, httpx.Request):
+                return response
+            url = str(response.url)
+        raise httpx.TooManyRedirects(f"Exceeded {self.max_redirects} redirects.", request=response)
+
+    async def _download_hop(self, client: httpx.AsyncClient, url: str, headers=None):
+        """One request under its host's slot: (text, headers) as in `download()`, or the redirect's next request."""
+        async with self._host_slot(url), client.stream("GET", url, headers=headers) as response:
+            if response.next_request is not None:
+                return response.next_request
+            if response.status_code == 304:
+                return None, response.headers
+            response.raise_for_status()
+            encoding = response.charset_encoding or "utf-8"
+            try:
+                codecs.lookup(encoding)
+            except LookupError:
+                encoding = "utf-8"
+
+            async def capped_chunks():
+                read = 0
+                async for chunk in response.aiter_bytes():
+                    yield chunk[:self.max_bytes - read]
+                    read += len(chunk)
+                    if read >= self.max_bytes:
+                        break
+
+            return await aextract_text(capped_chunks(), max_chars=self.max_chars, encoding=encoding), response.headers
+
+    async def fetch_text(self, url: str) -> str:
+        """Return the page's cleaned text from the cache, revalidating or downloading it when needed."""
+        return await self.cache.afetch(url, self.download)
+
+    async def aclose(self):
+        """Close the pooled client; the next fetch creates a new one."""
+        client, loop = self._client, self._loop
+        self._client = self._loop = None
+        if client is not None and not loop.is_closed():
+            await client.aclose()
+
+    async def __aenter__(self) -> "AsyncFetcher":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+# Shared by every team in the process so crawls reuse pooled keep-alive connections
+fetcher = AsyncFetcher(
+    max_per_host=int(os.getenv("FETCH_MAX_PER_HOST", 8)),
+    connect_timeout=float(os.getenv("FETCH_CONNECT_TIMEOUT", 10)),
+    read_timeout=float(os.getenv("FETCH_READ_TIMEOUT", 30)),
+    max_redirects=int(os.getenv("FETCH_MAX_REDIRECTS", 5)),
+)
+
+
+async def afetch_url_text(url: str) -> str:
+    """Fetch and clean the main text content from a webpage."""
+    try:
+        text = await fetcher.fetch_text(url)
+        if text:
+            return text
+        return "Error: No content found at the provided URL."
+    except Exception as e:
+        return f"Error: Failed to fetch content from the URL. Details: {str(e)}"
@@ -0,0 +1,240 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from typing import Mapping
+from dataclasses import dataclass, asdict
+from dotenv import load_dotenv
+from mvp import create_model_client, create_team, build_task
+from pipeline import selector_calls_saved
+from chunking import build_faq_for_url, parse_faq_json
+from knowledge_base import KnowledgeBase
+from dedup import NearDuplicateIndex, dedup_faqs
+from instrumentation import RunRecorder
+from model_tiers import close_clients, create_role_clients, parse_tiers
+from checkpoint import CheckpointStore, Checkpointer
+from async_fetch import fetcher
+from autogen_agentchat.base import TaskResult
+from autogen_core.models import ChatCompletionClient
+
+# Load environment variables
+load_dotenv()
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one URL's team run."""
+    url: str
+    ok: bool
+    elapsed: float
+    stop_reason: str | None = None
+    output: str | None = None
+    error: str | None = None
+    selector_calls_saved: int = 0
+    duplicates_dropped: int = 0
+    model_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+    resumed: bool = False
+
+
+def read_urls(path: str) -> list[str]:
+    """Read one URL per line from a file, or from stdin when path is "-". Blank lines and # comments are skipped."""
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        urls = [line.strip() for line in stream]
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    # Keep the first occurrence of each URL so a duplicated line doesn't pay for a second run
+    return list(dict.fromkeys(u for u in urls if u and not u.startswith("#")))
+
+
+def _final_output(messages) -> str | None:
+    """Return the last non-empty text message of a run, which is where the team leaves the knowledge base."""
+    for message in reversed(messages):
+        content = getattr(message, "content", None)
+        if isinstance(content, str) and content.strip():
+            return content.strip()
+    return None
+
+
+async def _run_team(team, task: str | None, recorder: RunRecorder, checkpointer: Checkpointer | None = None) -> TaskResult:
+    """Drive the team's stream through the recorder (and checkpointer) and return its final TaskResult.
+
+    A None task continues the run restored into the team.
+    """
+    result = None
+    stream = recorder.track(team.run_stream(task=task))
+    if checkpointer is not None:
+        stream = checkpointer.track(stream)
+    async for message in stream:
+        if isinstance(message, TaskResult):
+            result = message
+    return result
+
+
+def _duplicates_dropped(messages) -> int:
+    return sum(int(m.metadata.get("dropped", 0)) for m in messages if getattr(m, "source", None) == "DeduplicatorAgent")
+
+
+def _dedup_output(output: str, dedup_index: NearDuplicateIndex, url: str) -> tuple[str, int]:
+    """Drop the near-duplicate Q&A pairs from a final FAQ reply; replies that aren't a JSON array pass through."""
+    try:
+        faqs = parse_faq_json(output)
+    except ValueError:
+        return output, 0
+    kept, dropped = dedup_faqs(faqs, dedup_index, url)
+    return json.dumps(kept), dropped
+
+
+async def run_one(url: str, model_client, semaphore: asyncio.Semaphore, timeout: float, mode: str = "selector", dedup_index: NearDuplicateIndex | None = None,
+                  role_clients: Mapping[str, ChatCompletionClient] | None = None, checkpoints: CheckpointStore | None = None, resume: bool = False) -> BatchResult:
+    """Run an independent team on a single URL, bounded by the shared semaphore and a per-URL timeout.
+
+    A shared `dedup_index` drops Q&A pairs that near-duplicate those of other pages: in pipeline mode through
+    the team's DeduplicatorAgent, in the other modes from the final output.
+    `role_clients` gives individual roles their own model (see model_tiers.py). With `checkpoints` the team's
+    state is saved before every turn, and `resume` continues the URL's latest interrupted run instead of starting over.
+    """
+    async with semaphore:
+        recorder = RunRecorder()
+        start = time.perf_counter()
+        try:
+            if mode == "map-reduce":
+                client = recorder.wrap((role_clients or {}).get("FAQGeneratorAgent", model_client), "FAQGeneratorAgent")
+                faqs = await asyncio.wait_for(build_faq_for_url(url, client), timeout=timeout)
+                dropped = 0
+                if dedup_index is not None:
+                    faqs, dropped = dedup_faqs(faqs, dedup_index, url)
+                return BatchResult(
+                    url=url, ok=True, elapsed=time.perf_counter() - start, output=json.dumps(faqs), duplicates_dropped=dropped, **recorder.totals()
+                )
+
+            checkpointer = Checkpointer(checkpoints) if checkpoints is not None else None
+            team = create_team(model_client, mode=mode, recorder=recorder, dedup_index=dedup_index, source=url, role_clients=role_clients, checkpointer=checkpointer)
+            task = build_task(url)
+            interrupted = checkpoints.interrupted(key=url) if checkpoints is not None and resume else []
+            if interrupted:
+                await checkpointer.restore(interrupted[0]["run_id"])
+                task = None
+            elif checkpointer is not None:
+                checkpointer.begin(recorder.run_id, key=url, task=task)
+            result = await asyncio.wait_for(_run_team(team, task, recorder, checkpointer), timeout=timeout)
+            output, dropped = _final_output(result.messages), _duplicates_dropped(result.messages)
+            if mode == "selector" and dedup_index is not None and output:
+                # The model picks the speakers, so there's no dedup stage; dedup the final FAQ here instead
+                output, dropped = _dedup_output(output, dedup_index, url)
+            return BatchResult(
+                url=url,
+                ok=True,
+                elapsed=time.perf_counter() - start,
+                stop_reason=result.stop_reason,
+                output=output,
+                selector_calls_saved=selector_calls_saved(result.messages) if mode == "pipeline" else 0,
+                duplicates_dropped=dropped,
+                resumed=bool(interrupted),
+                **recorder.totals(),
+            )
+        except asyncio.TimeoutError:
+            return BatchResult(url=url, ok=False, elapsed=time.perf_counter() - start, error=f"Timed out after {timeout:.0f}s")
+        except Exception as e:
+            return BatchResult(url=url, ok=False, elapsed=time.perf_counter() - start, error=f"{type(e).__name__}: {e}")
+
+
+async def run_batch(urls: list[str], concurrency: int = 8, timeout: float = 300.0, model_client=None, on_result=None, mode: str = "selector", dedup_index: NearDuplicateIndex | None = None,
+                    role_clients: Mapping[str, ChatCompletionClient] | None = None, checkpoints: CheckpointStore | None = None, resume: bool = False) -> list[BatchResult]:
+    """Run one team per URL on the current event loop with at most `concurrency` teams in flight.
+
+    Results are handed to `on_result` as soon as each URL finishes, so a slow page never delays the
+    reporting of the others. The returned list is in completion order.
+    """
+    model_client = model_client or create_model_client()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    tasks = [asyncio.create_task(run_one(url, model_client, semaphore, timeout, mode, dedup_index, role_clients, checkpoints, resume)) for url in urls]
+    results = []
+    for next_done in asyncio.as_completed(tasks):
+        result = await next_done
+        results.append(result)
+        if on_result:
+            on_result(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build FAQs for many URLs at once.")
+    parser.add_argument("urls", nargs="?", default="-", help="File with one URL per line, or - for stdin (default).")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Maximum number of teams in flight.")
+    parser.add_argument("-t", "--timeout", type=float, default=300.0, help="Per-URL timeout in seconds.")
+    parser.add_argument("--mode", choices=["selector", "pipeline", "map-reduce"], default="selector", help="Let the model pick speakers, run the fixed agent pipeline, or generate FAQs per chunk without agents.")
+    parser.add_argument("-o", "--output", default="output/batch_results.jsonl", help="JSONL file receiving one result per URL.")
+    parser.add_argument("--failures", default="output/batch_failures.json", help="JSON report of the URLs that failed.")
+    parser.add_argument("--knowledge-base", default="output/knowledge_base.jsonl", help="Append-only store receiving each URL's FAQs.")
+    parser.add_argument("--no-dedup", action="store_true", help="Keep Q&A pairs that near-duplicate other pages or the knowledge base.")
+    parser.add_argument("--tiers", default=os.getenv("MODEL_TIERS"), help="Per-role models: a preset from model_tiers.TIERS or e.g. Selector=Ollama,IndexerAgent=Ollama.")
+    parser.add_argument("--checkpoints", default="output/checkpoints.db", help="Store of per-turn team checkpoints (not used in map-reduce mode).")
+    parser.add_argument("--resume", action="store_true", help="Continue each URL's latest interrupted run from its last checkpoint.")
+    args = parser.parse_args()
+
+    urls = read_urls(args.urls)
+    if not urls:
+        print("No URLs to process.")
+        return
+
+    print(f"Processing {len(urls)} URLs with concurrency {args.concurrency}...")
+    start = time.perf_counter()
+    kb = KnowledgeBase(args.knowledge_base)
+    dedup_index = None if args.no_dedup else NearDuplicateIndex.from_knowledge_base(kb)
+    with open(args.output, "w", encoding="utf-8") as out:
+        def on_result(result: BatchResult):
+            out.write(json.dumps(asdict(result)) + "\n")
+            out.flush()
+            if result.ok and result.output:
+                try:
+                    kb.append(result.url, parse_faq_json(result.output))
+                except ValueError:
+                    # Replies that aren't a JSON array of categories stay in the results file only
+                    pass
+            status = "ok" if result.ok else f"FAILED ({result.error})"
+            print(f"[{result.elapsed:6.1f}s] {result.url}: {status}")
+
+        checkpoints = CheckpointStore(args.checkpoints)
+
+        async def run() -> list[BatchResult]:
+            model_client = create_model_client()
+            role_clients = create_role_clients(parse_tiers(args.tiers))
+            try:
+                async with fetcher:
+                    return await run_batch(urls, args.concurrency, args.timeout, model_client=model_client, on_result=on_result, mode=args.mode,
+                                           dedup_index=dedup_index, role_clients=role_clients, checkpoints=checkpoints, resume=args.resume)
+            finally:
+                await close_clients([model_client, *role_clients.values()])
+
+        results = asyncio.run(run())
+
+    failures = [asdict(r) for r in results if not r.ok]
+    with open(args.failures, "w", encoding="utf-8") as f:
+        json.dump(failures, f, indent=2)
+
+    categories = kb.compact()
+    elapsed = time.perf_counter() - start
+    if args.mode == "pipeline":
+        print(f"Pipeline mode saved {sum(r.selector_calls_saved for r in results)} selector model calls.")
+    if dedup_index is not None:
+        print(f"Dropped {sum(r.duplicates_dropped for r in results)} near-duplicate Q&A pairs locally.")
+    print(f"Model calls: {sum(r.model_calls for r in results)}, tokens: {sum(r.prompt_tokens for r in results)} prompt / "
+          f"{sum(r.completion_tokens for r in results)} completion, estimated cost ${sum(r.cost_usd for r in results):.4f}.")
+    if args.resume:
+        print(f"Resumed {sum(r.resumed for r in results)} interrupted runs from their checkpoints.")
+    print(f"Done: {len(results) - len(failures)} succeeded, {len(failures)} failed in {elapsed:.1f}s ({len(results) / elapsed:.2f} URLs/s).")
+    print(f"Knowledge base {args.knowledge_base} now has {categories} categories.")
+    if failures:
+        print(f"Failure report written to {args.failures}")
+
+
+if __name__ == "__main__":
+    main()
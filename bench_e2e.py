@@ -0,0 +1,364 @@
+"""Offline end-to-end benchmark of the FAQ team: local fixture pages and a scripted model client.
+
+A local HTTP server serves fixture pages (from a few KB up to pages past the fetch byte cap) and the mvp.py
+team runs against them with ScriptedChatCompletionClient, which answers every agent and the selector
+deterministically without a network call. Each scenario runs in its own process so peak RSS is its own; the
+report has wall time, model calls, prompt/completion tokens, message count and peak RSS per scenario.
+
+Results are compared with the committed baseline (bench_baseline.json) and the script exits with status 1 when
+a scenario regresses past the tolerances, or when the baseline is missing. After an intended change, refresh
+the baseline with --save-baseline.
+
+Map-reduce chunking counts tokens with tiktoken, whose BPE file is downloaded on first use. Without network
+access, point TIKTOKEN_CACHE_DIR at a pre-filled cache; otherwise chunking falls back to an approximate count
+and chunk numbers differ. The baseline records which counting it was saved with and only compares against runs
+that count the same way; the committed one was saved offline, with the approximate count.
+"""
+import os
+import re
+import sys
+import ast
+import json
+import time
+import asyncio
+import argparse
+import platform
+import resource
+import tempfile
+import threading
+import subprocess
+from statistics import median
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Mapping, Optional, Sequence
+from autogen_core import FunctionCall
+from autogen_core.models import (
+    ChatCompletionClient,
+    CreateResult,
+    FunctionExecutionResultMessage,
+    ModelInfo,
+    RequestUsage,
+    SystemMessage,
+)
+from bench_extract import make_page
+from chunking import ApproximateEncoding, get_encoding, parse_faq_json
+
+MODEL_INFO: ModelInfo = {"vision": False, "function_calling": True, "json_output": True, "family": "unknown", "structured_output": False}
+
+# Name -> (team mode, fixture page size in KB, whether to add the near-duplicate index)
+SCENARIOS = {
+    "selector-small": ("selector", 20, False),
+    "pipeline-small": ("pipeline", 20, False),
+    "pipeline-large": ("pipeline", 1024, True),
+    "pipeline-huge": ("pipeline", 8192, False),
+    "map-reduce-large": ("map-reduce", 1024, False),
+}
+# The order the scripted selector walks; the planner closes the run
+SCRIPTED_ORDER = ["CrawlerAgent", "IndexerAgent", "FAQGeneratorAgent", "VerifierAgent", "ProjectPlanner"]
+# Metric -> (relative tolerance, absolute slack) before a change counts as a regression
+TOLERANCES = {
+    "model_calls": (0.0, 0),
+    "messages": (0.0, 0),
+    "prompt_tokens": (0.05, 50),
+    "completion_tokens": (0.05, 50),
+    "wall_s": (0.5, 0.5),
+    "peak_rss_mb": (0.25, 25),
+}
+_HANDLE = re.compile(r"doc-[0-9a-f]{8}")
+_URL = re.compile(r"https?://\S+")
+
+
+def message_text(message) -> str:
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return "\n".join(getattr(item, "content", None) or getattr(item, "arguments", None) or str(item) for item in content)
+
+
+def first_sentence(text: str, limit: int = 160) -> str:
+    text = re.sub(r"^\[doc-[0-9a-f]{8} section \d+\]\s*", "", text.strip())
+    return (re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0] or text)[:limit]
+
+
+class ScriptedChatCompletionClient(ChatCompletionClient):
+    """Deterministic stand-in for a chat model that plays every role of the FAQ team.
+
+    The role is recognised from the system message (or the selector and map-reduce prompts), and the reply is
+    derived from the conversation: the crawler fetches the task's URL, the indexer and FAQ generator read
+    sections of the stored document before answering, the verifier returns the latest FAQ JSON and the planner
+    terminates. Token usage is estimated at four characters per token, so prompt growth shows in the report.
+    """
+
+    def __init__(self):
+        self._usage = RequestUsage(prompt_tokens=0, completion_tokens=0)
+        self._last_usage = RequestUsage(prompt_tokens=0, completion_tokens=0)
+        self._calls = 0
+
+    def _role(self, messages: Sequence) -> str:
+        system = next((message_text(m) for m in messages if isinstance(m, SystemMessage)), "")
+        prompt = message_text(messages[-1]) if messages else ""
+        if "You are in a role play game" in system + prompt:
+            return "Selector"
+        if re.search(r"The following text is part \d+ of \d+", prompt):
+            return "MapReduce"
+        for marker, role in (
+            ("planning agent", "ProjectPlanner"),
+            ("extracting useful text", "CrawlerAgent"),
+            ("organize content", "IndexerAgent"),
+            ("generate helpful Q&A", "FAQGeneratorAgent"),
+            ("polish, deduplicate", "VerifierAgent"),
+        ):
+            if marker in system:
+                return role
+        return "Unknown"
+
+    def _call(self, name: str, **arguments) -> FunctionCall:
+        self._calls += 1
+        return FunctionCall(id=f"call_{self._calls}", name=name, arguments=json.dumps(arguments))
+
+    def _reply(self, role: str, messages: Sequence) -> str | list[FunctionCall]:
+        transcript = "\n".join(message_text(m) for m in messages)
+        reflecting = isinstance(messages[-1], FunctionExecutionResultMessage)
+        handles = _HANDLE.findall(transcript)
+        sections = [int(n) for n in re.findall(r"in (\d+) sections", transcript)]
+
+        if role == "Selector":
+            prompt = message_text(messages[-1])
+            participants = ast.literal_eval(re.findall(r"select the next role from (\[.*?\])", prompt)[-1])
+            history = prompt.split("Only return the role.", 1)[-1]
+            spoken = set(re.findall(r"^(\w+): ", history, flags=re.MULTILINE))
+            return next((name for name in SCRIPTED_ORDER if name in participants and name not in spoken), "ProjectPlanner")
+        if role == "MapReduce":
+            part = re.search(r"part (\d+) of (\d+)", transcript).group(1)
+            text = transcript.split("Text:", 1)[-1]
+            return json.dumps([{"category": f"Part {part}", "questions": [{"question": f"What does part {part} cover?", "answer": first_sentence(text)}]}])
+        if role == "CrawlerAgent" and not reflecting:
+            return [self._call("fetch_document", url=_URL.search(transcript).group(0).rstrip(".,"))]
+        if role == "IndexerAgent" and not reflecting and handles:
+            opening = re.search(r"Opening: (\w+)", transcript)
+            return [self._call("search_document", handle=handles[-1], query=opening.group(1) if opening else "overview")]
+        if role == "IndexerAgent":
+            return "Categories:\n" + "\n".join(f"- Section {i}: sections [{i}]" for i in range(min(3, sections[-1] if sections else 1)))
+        if role == "FAQGeneratorAgent" and not reflecting and handles:
+            return [self._call("read_section", handle=handles[-1], section=i) for i in range(min(3, sections[-1] if sections else 1))]
+        if role == "FAQGeneratorAgent":
+            read = [message_text(r) for r in messages[-1].content] if reflecting else [transcript]
+            return json.dumps([
+                {"category": f"Section {i}", "questions": [{"question": f"What does section {i} explain?", "answer": first_sentence(text)}]}
+                for i, text in enumerate(read)
+            ])
+        if role == "VerifierAgent":
+            for message in reversed(messages):
+                try:
+                    return json.dumps(parse_faq_json(message_text(message)))
+                except ValueError:
+                    continue
+            return "[]"
+        return "All stages are complete: the page was crawled, indexed, turned into Q&A pairs and verified. TERMINATE"
+
+    async def create(self, messages: Sequence, *, tools=[], json_output=None, extra_create_args: Mapping[str, Any] = {}, cancellation_token: Optional[Any] = None) -> CreateResult:
+        content = self._reply(self._role(messages), messages)
+        prompt_chars = sum(len(message_text(m)) for m in messages) + sum(len(str(t)) for t in tools)
+        completion_chars = len(content) if isinstance(content, str) else sum(len(c.arguments) + len(c.name) for c in content)
+        self._last_usage = RequestUsage(prompt_tokens=prompt_chars // 4, completion_tokens=completion_chars // 4)
+        self._usage = RequestUsage(
+            prompt_tokens=self._usage.prompt_tokens + self._last_usage.prompt_tokens,
+            completion_tokens=self._usage.completion_tokens + self._last_usage.completion_tokens,
+        )
+        finish_reason = "stop" if isinstance(content, str) else "function_calls"
+        return CreateResult(finish_reason=finish_reason, content=content, usage=self._last_usage, cached=False)
+
+    async def create_stream(self, messages: Sequence, *, tools=[], json_output=None, extra_create_args: Mapping[str, Any] = {}, cancellation_token: Optional[Any] = None):
+        result = await self.create(messages, tools=tools, json_output=json_output, extra_create_args=extra_create_args)
+        if isinstance(result.content, str):
+            for start in range(0, len(result.content), 16):
+                yield result.content[start:start + 16]
+        yield result
+
+    async def close(self) -> None:
+        pass
+
+    def actual_usage(self) -> RequestUsage:
+        return self._last_usage
+
+    def total_usage(self) -> RequestUsage:
+        return self._usage
+
+    def count_tokens(self, messages: Sequence, *, tools=[]) -> int:
+        return sum(len(message_text(m)) for m in messages) // 4
+
+    def remaining_tokens(self, messages: Sequence, *, tools=[]) -> int:
+        return 128_000 - self.count_tokens(messages, tools=tools)
+
+    @property
+    def capabilities(self):  # type: ignore
+        return MODEL_INFO
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return MODEL_INFO
+
+
+def make_handler():
+    pages: dict[int, bytes] = {}
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        """Serves /page/<size in KB>, generated once per size."""
+
+        def do_GET(self):
+            match = re.fullmatch(r"/page/(\d+)", self.path)
+            if not match:
+                self.send_error(404)
+                return
+            size = int(match.group(1))
+            if size not in pages:
+                pages[size] = make_page(size * 1024)
+            body = pages[size]
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                # The fetcher stops reading once it hits its byte cap
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    return FixtureHandler
+
+
+async def run_scenario(name: str, page_base: str) -> dict:
+    """Run one scenario in this process and return its metrics."""
+    # Imported here so the parent process, which only serves pages, stays small
+    from async_fetch import fetcher
+    from chunking import build_faq_for_url
+    from dedup import NearDuplicateIndex
+    from instrumentation import RunRecorder
+    from mvp import build_task, create_team
+
+    mode, page_kb, dedup = SCENARIOS[name]
+    url = f"{page_base}/page/{page_kb}"
+    client = ScriptedChatCompletionClient()
+    recorder = RunRecorder(log_dir=tempfile.mkdtemp(prefix="bench_e2e_runs_"))
+    started = time.perf_counter()
+    async with fetcher:
+        if mode == "map-reduce":
+            output = json.dumps(await build_faq_for_url(url, recorder.wrap(client, "FAQGeneratorAgent")))
+            messages = 0
+        else:
+            team = create_team(client, mode=mode, recorder=recorder, dedup_index=NearDuplicateIndex() if dedup else None, source=url)
+            result = None
+            async for message in recorder.track(team.run_stream(task=build_task(url))):
+                result = message
+            messages = len(result.messages)
+            faq_messages = [m.to_text() for m in result.messages if getattr(m, "source", "") in ("VerifierAgent", "DeduplicatorAgent", "FAQGeneratorAgent")]
+            output = faq_messages[-1] if faq_messages else ""
+    wall = time.perf_counter() - started
+    try:
+        valid = bool(parse_faq_json(output))
+    except ValueError:
+        valid = False
+    totals = recorder.totals()
+    return {
+        "wall_s": round(wall, 3),
+        "model_calls": totals["model_calls"],
+        "prompt_tokens": totals["prompt_tokens"],
+        "completion_tokens": totals["completion_tokens"],
+        "messages": messages,
+        # ru_maxrss is in KB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "valid_faq": valid,
+    }
+
+
+def measure(name: str, page_base: str, repeat: int) -> dict:
+    """Run a scenario `repeat` times, each in a fresh process; report the median wall time and the largest RSS."""
+    runs = []
+    for _ in range(repeat):
+        env = {**os.environ, "FETCH_CACHE_DIR": tempfile.mkdtemp(prefix="bench_e2e_cache_"), "FETCH_CACHE_TTL": "0"}
+        completed = subprocess.run(
+            [sys.executable, __file__, "--run-scenario", name, "--page-base", page_base],
+            env=env, capture_output=True, text=True,
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"Scenario {name} failed:\n{completed.stderr[-2000:]}")
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    result = dict(runs[-1])
+    result["wall_s"] = round(median(r["wall_s"] for r in runs), 3)
+    result["peak_rss_mb"] = max(r["peak_rss_mb"] for r in runs)
+    return result
+
+
+def regressions(name: str, result: dict, baseline: dict) -> list[str]:
+    found = [] if result["valid_faq"] else [f"{name}: the run no longer produces valid FAQ JSON"]
+    for metric, (relative, absolute) in TOLERANCES.items():
+        if metric in baseline and result[metric] > baseline[metric] * (1 + relative) + absolute:
+            found.append(f"{name}: {metric} {result[metric]} vs baseline {baseline[metric]}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of the FAQ team with a scripted model client.")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario; the median wall time is reported.")
+    parser.add_argument("--baseline", default="bench_baseline.json")
+    parser.add_argument("--save-baseline", action="store_true", help="Write these results as the new baseline instead of comparing.")
+    parser.add_argument("--run-scenario", help=argparse.SUPPRESS)
+    parser.add_argument("--page-base", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_scenario:
+        print(json.dumps(asyncio.run(run_scenario(args.run_scenario, args.page_base))))
+        return
+
+    pages = ThreadingHTTPServer(("localhost", 0), make_handler())
+    pages.daemon_threads = True
+    threading.Thread(target=pages.serve_forever, daemon=True).start()
+    page_base = f"http://localhost:{pages.server_address[1]}"
+
+    token_counting = "approximate" if isinstance(get_encoding(), ApproximateEncoding) else "tiktoken"
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            saved = json.load(f)
+        baseline = saved.get("scenarios", {})
+        if not args.save_baseline and saved.get("token_counting", token_counting) != token_counting:
+            sys.exit(f"{args.baseline} was saved with {saved['token_counting']} token counting but this run uses {token_counting}; "
+                     "compare against a baseline saved the same way.")
+    elif not args.save_baseline:
+        sys.exit(f"No baseline at {args.baseline}; save one with --save-baseline.")
+
+    results, failures = {}, []
+    print(f"{'scenario':<18} {'wall_s':>7} {'calls':>6} {'prompt':>9} {'compl':>7} {'msgs':>5} {'rss_mb':>7} {'valid':>6}")
+    try:
+        for name in args.scenarios:
+            r = results[name] = measure(name, page_base, args.repeat)
+            print(f"{name:<18} {r['wall_s']:>7} {r['model_calls']:>6} {r['prompt_tokens']:>9} {r['completion_tokens']:>7} {r['messages']:>5} {r['peak_rss_mb']:>7} {str(r['valid_faq']):>6}")
+            if not args.save_baseline:
+                if name in baseline:
+                    failures += regressions(name, r, baseline[name])
+                else:
+                    failures.append(f"{name}: not in the baseline; save it with --save-baseline")
+    finally:
+        pages.shutdown()
+
+    if args.save_baseline:
+        saved = {"scenarios": baseline}
+        saved["scenarios"].update(results)
+        saved["python"] = platform.python_version()
+        saved["token_counting"] = token_counting
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(saved, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+    elif failures:
+        print("\nREGRESSIONS against " + args.baseline + ":")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import gc
+import time
+import argparse
+import tracemalloc
+from bs4 import BeautifulSoup
+from extract import extract_text
+from tools import clean_text
+
+CHUNK_SIZE = 64 * 1024
+
+
+def make_page(size_bytes: int) -> bytes:
+    """Build a synthetic article page of roughly `size_bytes` with the boilerplate real pages carry."""
+    head = (
+        "<html><head><title>Benchmark page</title><style>body { font-family: sans-serif; }</style>"
+        "<script>var analytics = {track: function () {}};</script></head><body>"
+        "<nav><ul>" + "".join(f"<li><a href='/s{i}'>Section {i}</a></li>" for i in range(50)) + "</ul></nav><main>"
+    )
+    paragraph = (
+        "<h2>Heading</h2><p>Quantum mechanics describes nature at the scale of atoms and "
+        "<b>subatomic</b> particles.\n   It differs from   classical physics in that energy, momentum and "
+        "other quantities are often restricted to discrete values.</p>"
+        "<script>window.ads && window.ads.push({slot: 'inline'});</script>\n"
+    )
+    tail = "</main><footer>Copyright, contact, privacy policy and terms of use.</footer></body></html>"
+    repeats = max(1, (size_bytes - len(head) - len(tail)) // len(paragraph))
+    return (head + paragraph * repeats + tail).encode("utf-8")
+
+
+def current_path(page: bytes) -> str:
+    """The previous fetch_url_text_tool path: WebBaseLoader's parse, a second BeautifulSoup parse, then a regex."""
+    loaded = BeautifulSoup(page, "html.parser").get_text()
+    return clean_text(BeautifulSoup(loaded, "html.parser").get_text())
+
+
+def streaming_path(page: bytes, max_chars: int) -> str:
+    chunks = (page[i:i + CHUNK_SIZE] for i in range(0, len(page), CHUNK_SIZE))
+    return extract_text(chunks, max_chars=max_chars)
+
+
+def measure(func, *args):
+    """Return (cpu seconds, peak traced memory in bytes, output length) for one call."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.process_time()
+    output = func(*args)
+    cpu = time.process_time() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu, peak, len(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the old BeautifulSoup double parse with the streaming extractor.")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 5, 20], help="Page sizes in MB.")
+    parser.add_argument("--max-chars", type=int, default=200_000, help="Character cap for the capped streaming run.")
+    args = parser.parse_args()
+
+    print(f"{'page':>8} {'path':<22} {'cpu (s)':>9} {'peak (MB)':>10} {'chars':>11}")
+    for size in args.sizes:
+        page = make_page(int(size * 1024 * 1024))
+        runs = [
+            ("current (bs4 x2)", current_path, page),
+            ("streaming, uncapped", streaming_path, page, len(page)),
+            (f"streaming, {args.max_chars:,} ch", streaming_path, page, args.max_chars),
+        ]
+        for name, func, *func_args in runs:
+            cpu, peak, chars = measure(func, *func_args)
+            print(f"{size:>6.1f}MB {name:<22} {cpu:>9.3f} {peak / 2**20:>10.1f} {chars:>11,}")
+
+
+if __name__ == "__main__":
+    main()
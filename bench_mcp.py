@@ -0,0 +1,128 @@
+"""Load test for the MCP server over SSE: N concurrent clients calling fetch_url_text against local pages.
+
+Starts a stand-in page server and `server.py --transport sse`, then reports throughput and latency
+percentiles for each client count. Nothing leaves the machine; the fetch cache lives in a temporary
+directory with a zero TTL, so every call downloads (use --cache to measure warm-cache calls instead).
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+
+
+def make_handler(page_kb: int, latency: float):
+    paragraph = "<p>Quantum mechanics describes nature at the smallest scales of energy levels of atoms.</p>"
+    body = ("<html><body>" + paragraph * (page_kb * 1024 // len(paragraph)) + "</body></html>").encode("utf-8")
+
+    class PageHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return PageHandler
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("localhost", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"MCP server didn't start listening on port {port}")
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def client_run(server_url: str, page_base: str, client_id: int, calls: int, latencies: list[float], errors: list[str]):
+    async with sse_client(server_url) as (read, write), ClientSession(read, write) as session:
+        await session.initialize()
+        for i in range(calls):
+            started = time.perf_counter()
+            result = await session.call_tool("fetch_url_text", {"url": f"{page_base}/page/{client_id}-{i}"})
+            latencies.append(time.perf_counter() - started)
+            text = result.content[0].text if result.content else ""
+            if result.isError or text.startswith("Error:"):
+                errors.append(text[:200])
+
+
+async def run_level(server_url: str, page_base: str, clients: int, calls: int) -> dict:
+    latencies, errors = [], []
+    started = time.perf_counter()
+    await asyncio.gather(*(client_run(server_url, page_base, c, calls, latencies, errors) for c in range(clients)))
+    wall = time.perf_counter() - started
+    return {
+        "clients": clients,
+        "calls": len(latencies),
+        "errors": len(errors),
+        "wall_s": round(wall, 2),
+        "calls_per_s": round(len(latencies) / wall, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test server.py over SSE with concurrent MCP clients.")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16, 32], help="Concurrent client counts to test.")
+    parser.add_argument("--calls", type=int, default=20, help="fetch_url_text calls per client.")
+    parser.add_argument("--page-kb", type=int, default=200, help="Size of each stand-in page in KB.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated page server latency in seconds.")
+    parser.add_argument("--cache", action="store_true", help="Keep the fetch cache warm instead of downloading every call.")
+    args = parser.parse_args()
+
+    pages = ThreadingHTTPServer(("localhost", 0), make_handler(args.page_kb, args.latency))
+    threading.Thread(target=pages.serve_forever, daemon=True).start()
+    page_base = f"http://localhost:{pages.server_address[1]}"
+
+    port = free_port()
+    cache_dir = tempfile.mkdtemp(prefix="bench_mcp_")
+    env = {**os.environ, "MCP_PORT": str(port), "FETCH_CACHE_DIR": cache_dir, "FETCH_CACHE_TTL": "86400" if args.cache else "0"}
+    server = subprocess.Popen([sys.executable, "server.py", "--transport", "sse"], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        server_url = f"http://localhost:{port}/sse"
+        print(f"{'clients':>7} {'calls':>6} {'errors':>6} {'wall_s':>7} {'calls/s':>8} {'p50_ms':>7} {'p99_ms':>7}")
+        for clients in args.clients:
+            if args.cache:
+                # Warm-up pass so the measured calls are all cache hits
+                asyncio.run(run_level(server_url, page_base, clients, args.calls))
+            r = asyncio.run(run_level(server_url, page_base, clients, args.calls))
+            print(f"{r['clients']:>7} {r['calls']:>6} {r['errors']:>6} {r['wall_s']:>7} {r['calls_per_s']:>8} {r['p50_ms']:>7} {r['p99_ms']:>7}")
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            # uvicorn waits for lingering SSE streams on a graceful shutdown
+            server.kill()
+        pages.shutdown()
+
+
+if __name__ == "__main__":
+    main()
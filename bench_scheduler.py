@@ -0,0 +1,144 @@
+"""Exercise the provider scheduler against local stand-in chat completion endpoints.
+
+Each stand-in speaks the OpenAI chat completions API and can be told to answer 429 or 503 some of the time
+and to add a slow tail to its latency. The benchmark fires concurrent calls at a plain client and at
+scheduler configurations (failover, hedging), then prints success counts, wall time and scheduler metrics.
+"""
+import json
+import time
+import random
+import asyncio
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from autogen_core.models import UserMessage
+from autogen_ext.models.openai import OpenAIChatCompletionClient
+from scheduler import Provider, SchedulingChatCompletionClient
+
+MODEL_INFO = {"vision": False, "function_calling": True, "json_output": True, "family": "unknown", "structured_output": False}
+
+
+def make_handler(name: str, rate_limit: float, server_error: float, latency: float, slow_tail: float, seed: int):
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    class CompletionHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self, status: int, payload: dict, headers: dict | None = None):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                # The losing side of a hedged request was cancelled
+                pass
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with lock:
+                roll, tail = rng.random(), rng.random()
+            if roll < rate_limit:
+                return self._reply(429, {"error": {"message": "Rate limit exceeded", "type": "rate_limit"}}, {"Retry-After": "0.2"})
+            if roll < rate_limit + server_error:
+                return self._reply(503, {"error": {"message": "Overloaded", "type": "server_error"}})
+            time.sleep(latency * (10 if tail < slow_tail else 1))
+            self._reply(200, {
+                "id": "stand-in", "object": "chat.completion", "created": int(time.time()), "model": "stand-in",
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": f"answer from {name}"}}],
+                "usage": {"prompt_tokens": 20, "completion_tokens": 5, "total_tokens": 25},
+            })
+
+        def log_message(self, *args):
+            pass
+
+    return CompletionHandler
+
+
+class EndpointServer(ThreadingHTTPServer):
+    # The default backlog of 5 drops connections under a burst of concurrent calls
+    request_queue_size = 256
+    daemon_threads = True
+
+
+def start_endpoint(name: str, **behaviour) -> tuple[ThreadingHTTPServer, str]:
+    server = EndpointServer(("localhost", 0), make_handler(name, **behaviour))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://localhost:{server.server_address[1]}/v1"
+
+
+def stand_in_client(base_url: str) -> OpenAIChatCompletionClient:
+    return OpenAIChatCompletionClient(model="stand-in", base_url=base_url, api_key="unused", model_info=MODEL_INFO, max_retries=0)
+
+
+async def fire(client, calls: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+
+    async def one(i: int):
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await client.create([UserMessage(content=f"question {i}", source="user")])
+                latencies.append(time.perf_counter() - started)
+            except Exception:
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    latencies.sort()
+    return {
+        "ok": len(latencies),
+        "failed": failures,
+        "wall_s": round(time.perf_counter() - started, 2),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))] * 1000, 1) if latencies else None,
+    }
+
+
+async def run(args):
+    flaky_server, flaky_url = start_endpoint("flaky", rate_limit=args.rate_limit, server_error=args.server_error, latency=args.latency, slow_tail=args.slow_tail, seed=1)
+    steady_server, steady_url = start_endpoint("steady", rate_limit=0.0, server_error=0.0, latency=args.latency * 1.5, slow_tail=args.slow_tail, seed=2)
+    try:
+        scenarios = {
+            "single client, no retries": lambda: stand_in_client(flaky_url),
+            "scheduler, failover": lambda: SchedulingChatCompletionClient(
+                [Provider("flaky", stand_in_client(flaky_url), requests_per_minute=args.rpm), Provider("steady", stand_in_client(steady_url), requests_per_minute=args.rpm)],
+                backoff_base=0.05,
+            ),
+            "scheduler, failover + hedging": lambda: SchedulingChatCompletionClient(
+                [Provider("flaky", stand_in_client(flaky_url), requests_per_minute=args.rpm), Provider("steady", stand_in_client(steady_url), requests_per_minute=args.rpm)],
+                backoff_base=0.05, hedge_quantile=0.9,
+            ),
+        }
+        for name, factory in scenarios.items():
+            client = factory()
+            print(f"{name}: {await fire(client, args.calls, args.concurrency)}")
+            if isinstance(client, SchedulingChatCompletionClient):
+                print(f"  metrics: {json.dumps(client.metrics())}")
+            await client.close()
+    finally:
+        flaky_server.shutdown()
+        steady_server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the provider scheduler against local stand-in endpoints.")
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rate-limit", type=float, default=0.2, help="Share of calls the flaky endpoint answers with 429.")
+    parser.add_argument("--server-error", type=float, default=0.05, help="Share of calls the flaky endpoint answers with 503.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Base response latency in seconds.")
+    parser.add_argument("--slow-tail", type=float, default=0.05, help="Share of calls that take ten times the base latency.")
+    parser.add_argument("--rpm", type=float, default=6000, help="Requests per minute allowed per provider.")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
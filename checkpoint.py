@@ -0,0 +1,258 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import argparse
+import threading
+from typing import Any, AsyncGenerator, Callable
+from autogen_agentchat.base import TaskResult
+
+# Delta markers: "d" = changed keys of a dict (with "r" for removed keys), "a" = items appended to a list,
+# "s" = a replaced value
+_DICT, _REMOVED, _APPEND, _SET = "d", "r", "a", "s"
+
+
+def state_delta(old: Any, new: Any) -> dict | None:
+    """Smallest delta turning `old` into `new`, or None when they're equal.
+
+    Team state is mostly message lists that only grow, so an appended list stores just its new items.
+    """
+    if old == new:
+        return None
+    if isinstance(old, dict) and isinstance(new, dict):
+        changed = {key: state_delta(old.get(key), value) if key in old else {_SET: value} for key, value in new.items()}
+        delta = {_DICT: {key: d for key, d in changed.items() if d is not None}}
+        removed = [key for key in old if key not in new]
+        if removed:
+            delta[_REMOVED] = removed
+        return delta
+    if isinstance(old, list) and isinstance(new, list) and len(new) >= len(old) and new[:len(old)] == old:
+        return {_APPEND: new[len(old):]}
+    return {_SET: new}
+
+
+def apply_delta(state: Any, delta: dict) -> Any:
+    if _SET in delta:
+        return delta[_SET]
+    if _APPEND in delta:
+        return state + delta[_APPEND]
+    state = {key: value for key, value in state.items() if key not in delta.get(_REMOVED, [])}
+    for key, d in delta[_DICT].items():
+        state[key] = apply_delta(state.get(key), d)
+    return state
+
+
+class CheckpointStore:
+    """SQLite store of team state checkpoints, written as one small delta per checkpoint.
+
+    Each run has a row in `runs` (its key, e.g. the URL, task and status) and one `deltas` row per checkpoint;
+    folding a run's deltas in order gives its latest state. Finished runs drop their deltas.
+    """
+
+    def __init__(self, path: str = "output/checkpoints.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        # Latest state per run in this process, so a new checkpoint only has to be diffed against it
+        self._states: dict[str, Any] = {}
+        # Runs a team in this process is writing to; a run can only have one writer
+        self._active: set[str] = set()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                key TEXT NOT NULL,
+                task TEXT NOT NULL,
+                status TEXT NOT NULL,
+                checkpoints INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS runs_key ON runs (key, updated_at);
+            CREATE TABLE IF NOT EXISTS deltas (
+                run_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                delta TEXT NOT NULL,
+                PRIMARY KEY (run_id, seq)
+            );
+        """)
+        self._db.commit()
+
+    def start(self, run_id: str, key: str = "", task: str = ""):
+        self.claim(run_id)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO runs (run_id, key, task, status, checkpoints, updated_at) VALUES (?, ?, ?, 'running', 0, ?)",
+                (run_id, key, task, time.time()),
+            )
+            self._db.execute("DELETE FROM deltas WHERE run_id = ?", (run_id,))
+            self._db.commit()
+        self._states.pop(run_id, None)
+
+    def claim(self, run_id: str):
+        """Mark a run as being written by a team in this process; raises if another team already is."""
+        with self._lock:
+            if run_id in self._active:
+                raise RuntimeError(f"Run {run_id!r} is still active.")
+            self._active.add(run_id)
+
+    def release(self, run_id: str):
+        with self._lock:
+            self._active.discard(run_id)
+
+    def save(self, run_id: str, state: dict) -> int:
+        """Store the difference between `state` and the run's previous checkpoint; returns the bytes written."""
+        # Round-trip through JSON so the comparison sees exactly what a load would return
+        state = json.loads(json.dumps(state, default=str))
+        delta = state_delta(self._states.get(run_id, {}), state)
+        self._states[run_id] = state
+        if delta is None:
+            return 0
+        value = json.dumps(delta, separators=(",", ":"))
+        with self._lock:
+            seq = self._db.execute("SELECT checkpoints FROM runs WHERE run_id = ?", (run_id,)).fetchone()[0]
+            self._db.execute("INSERT INTO deltas (run_id, seq, delta) VALUES (?, ?, ?)", (run_id, seq, value))
+            self._db.execute("UPDATE runs SET checkpoints = ?, status = 'running', updated_at = ? WHERE run_id = ?", (seq + 1, time.time(), run_id))
+            self._db.commit()
+        return len(value)
+
+    def load(self, run_id: str) -> dict | None:
+        """The run's latest checkpointed state, or None if it has none."""
+        with self._lock:
+            rows = self._db.execute("SELECT delta FROM deltas WHERE run_id = ? ORDER BY seq", (run_id,)).fetchall()
+        if not rows:
+            return None
+        state: Any = {}
+        for (delta,) in rows:
+            state = apply_delta(state, json.loads(delta))
+        self._states[run_id] = state
+        return state
+
+    def finish(self, run_id: str, status: str):
+        """Record how a run ended; completed runs don't need their checkpoints any more."""
+        with self._lock:
+            self._db.execute("UPDATE runs SET status = ?, updated_at = ? WHERE run_id = ?", (status, time.time(), run_id))
+            if status == "done":
+                self._db.execute("DELETE FROM deltas WHERE run_id = ?", (run_id,))
+            self._db.commit()
+            self._active.discard(run_id)
+        self._states.pop(run_id, None)
+
+    def interrupted(self, key: str | None = None) -> list[dict]:
+        """Resumable runs (stopped, failed, or still marked running after a crash), newest first.
+
+        Runs a team in this process is still writing to are left out.
+        """
+        query = "SELECT run_id, key, task, status, checkpoints, updated_at FROM runs WHERE status != 'done' AND checkpoints > 0"
+        params: tuple = ()
+        if key is not None:
+            query += " AND key = ?"
+            params = (key,)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY updated_at DESC", params).fetchall()
+        runs = [dict(zip(("run_id", "key", "task", "status", "checkpoints", "updated_at"), row)) for row in rows]
+        return [run for run in runs if run["run_id"] not in self._active]
+
+    def discard(self, run_id: str):
+        with self._lock:
+            self._db.execute("DELETE FROM deltas WHERE run_id = ?", (run_id,))
+            self._db.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+            self._db.commit()
+        self._states.pop(run_id, None)
+
+
+class Checkpointer:
+    """Checkpoints a team's state each time it picks the next speaker, and resumes interrupted runs.
+
+    Speaker selection is the one point where the state is consistent: the group chat manager and every
+    participant have taken in the last message, and the next speaker hasn't started. The team calls
+    `selector_func(...)` there, so pass it to SelectorGroupChat and set `checkpointer.team` to the team.
+    Pages the crawler stored live outside the team, so set `checkpointer.documents` to the team's
+    DocumentStore too; its pages are saved with the team state. Wrap each run's stream in `track()` to
+    record how the run ended.
+    """
+
+    def __init__(self, store: CheckpointStore):
+        self.store = store
+        self.team = None
+        self.documents = None
+        self.run_id: str | None = None
+        self.bytes_written = 0
+
+    def selector_func(self, inner: Callable | None = None):
+        """Async selector that checkpoints first, then defers to `inner` (None lets the model pick)."""
+
+        async def checkpoint_then_select(messages):
+            if self.team is not None and self.run_id is not None:
+                self.bytes_written += self.store.save(self.run_id, await self.save_state())
+            return inner(messages) if inner is not None else None
+
+        return checkpoint_then_select
+
+    async def save_state(self) -> dict:
+        return {"team": await self.team.save_state(), "documents": self.documents.save_state() if self.documents is not None else {}}
+
+    def begin(self, run_id: str, key: str = "", task: str = ""):
+        """Start checkpointing a new run."""
+        self.run_id = run_id
+        self.store.start(run_id, key, task)
+
+    async def restore(self, run_id: str) -> int:
+        """Load an interrupted run's last checkpoint into the team and return how many messages it had.
+
+        Continue it with `team.run_stream()` (no task). Termination conditions count afresh from there.
+        Raises RuntimeError if a team in this process is still running it.
+        """
+        self.store.claim(run_id)
+        try:
+            state = self.store.load(run_id)
+            if state is None:
+                raise KeyError(f"No checkpoint for run {run_id!r}.")
+            await self.team.reset()
+            await self.team.load_state(state["team"])
+            if self.documents is not None:
+                # Handles in the restored chat must resolve in this team's (possibly new) store
+                self.documents.load_state(state["documents"])
+        except BaseException:
+            self.store.release(run_id)
+            raise
+        self.run_id = run_id
+        manager_state = next((s for s in state["team"]["agent_states"].values() if "message_thread" in s), {})
+        return len(manager_state.get("message_thread", []))
+
+    async def track(self, stream: AsyncGenerator) -> AsyncGenerator:
+        """Pass a run's stream through unchanged, marking the run done, cancelled or failed when it ends."""
+        run_id, status = self.run_id, "failed"
+        try:
+            async for message in stream:
+                if isinstance(message, TaskResult):
+                    status = "done"
+                yield message
+        except (asyncio.CancelledError, GeneratorExit):
+            status = "cancelled"
+            raise
+        finally:
+            if run_id is not None:
+                self.store.finish(run_id, status)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List or discard interrupted team runs.")
+    parser.add_argument("--store", default="output/checkpoints.db")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="Show resumable runs, newest first.")
+    discard = sub.add_parser("discard", help="Delete a run's checkpoints.")
+    discard.add_argument("run_id")
+    args = parser.parse_args()
+
+    store = CheckpointStore(args.store)
+    if args.command == "list":
+        for run in store.interrupted():
+            updated = time.strftime("%Y-%m-%d %H:%M", time.localtime(run["updated_at"]))
+            print(f"{run['run_id']}  {run['status']:<9} {run['checkpoints']:>3} checkpoints  {updated}  {run['key']}")
+    else:
+        store.discard(args.run_id)
+
+
+if __name__ == "__main__":
+    main()
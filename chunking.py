@@ -0,0 +1,156 @@
+import re
+import json
+import asyncio
+from functools import cache
+import tiktoken
+from autogen_core.models import SystemMessage, UserMessage
+from async_fetch import afetch_url_text
+
+FAQ_SYSTEM_MESSAGE = "You generate helpful Q&A pairs for each category."
+
+CHUNK_PROMPT = """
+    The following text is part {index} of {total} of a webpage ({url}).
+
+    Break it down into categories and generate Q&A pairs in JSON format. Reply with the JSON only:
+    [
+        {{
+            "category": "Overview",
+            "questions": [
+                {{"question": "...", "answer": "..."}}
+            ]
+        }}
+    ]
+
+    Text:
+    {text}
+"""
+
+
+class ApproximateEncoding:
+    """Stand-in tokenizer counting one token per `chars_per_token` characters, for when tiktoken can't load its
+    BPE files (they're downloaded on first use, or read from TIKTOKEN_CACHE_DIR, so offline machines lack them)."""
+
+    def __init__(self, chars_per_token: int = 4):
+        self.chars_per_token = chars_per_token
+
+    def encode(self, text: str) -> list[str]:
+        return [text[i:i + self.chars_per_token] for i in range(0, len(text), self.chars_per_token)]
+
+    def decode(self, tokens: list[str]) -> str:
+        return "".join(tokens)
+
+
+@cache
+def get_encoding(model: str | None = None) -> tiktoken.Encoding | ApproximateEncoding:
+    """Return the tokenizer for `model`, falling back to cl100k_base for models tiktoken doesn't know (e.g. Gemini),
+    and to an approximate character count when the BPE file can't be loaded (e.g. offline without a cache)."""
+    try:
+        try:
+            return tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding("cl100k_base")
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        print(f"tiktoken encoding unavailable ({type(e).__name__}: {e}); approximating 4 characters per token.")
+        return ApproximateEncoding()
+
+
+def chunk_text(text: str, max_tokens: int = 2000, overlap: int = 200, model: str | None = None) -> list[str]:
+    """Split text into chunks of at most `max_tokens` tokens, each overlapping the previous one by `overlap` tokens."""
+    if overlap >= max_tokens:
+        raise ValueError("overlap must be smaller than max_tokens")
+    encoding = get_encoding(model)
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return [text] if text.strip() else []
+
+    chunks = []
+    step = max_tokens - overlap
+    for start in range(0, len(tokens), step):
+        chunks.append(encoding.decode(tokens[start:start + max_tokens]))
+        if start + max_tokens >= len(tokens):
+            break
+    return chunks
+
+
+def extract_json_array(text: str) -> list:
+    """Extract the JSON array from a model reply as is, tolerating code fences and surrounding prose."""
+    text = re.sub(r"```(?:json)?", "", text)
+    start, end = text.find("["), text.rfind("]")
+    if start == -1 or end <= start:
+        raise ValueError("No JSON array found in the model reply.")
+    data = json.loads(text[start:end + 1])
+    if not isinstance(data, list):
+        raise ValueError("Expected a JSON array of categories.")
+    return data
+
+
+def parse_faq_json(text: str) -> list[dict]:
+    """Extract the category/questions JSON array from a model reply, leniently: items that aren't category
+    objects are dropped. Use `extract_json_array` where the reply has to be checked as a whole."""
+    return [item for item in extract_json_array(text) if isinstance(item, dict) and "category" in item]
+
+
+def merge_faqs(parts: list[list[dict]]) -> list[dict]:
+    """Reduce per-chunk FAQ lists into one, merging categories by name and dropping repeated questions."""
+    merged: dict[str, dict] = {}
+    seen_questions: dict[str, set[str]] = {}
+    for part in parts:
+        for category in part:
+            name = str(category.get("category") or "").strip() or "General"
+            key = name.casefold()
+            if key not in merged:
+                merged[key] = {"category": name, "questions": []}
+                seen_questions[key] = set()
+            questions = category.get("questions") or []
+            # Skip malformed model output (null or non-list questions, non-object items) rather than failing the URL
+            for qa in questions if isinstance(questions, list) else []:
+                if not isinstance(qa, dict):
+                    continue
+                question = str(qa.get("question") or "").strip()
+                normalized = re.sub(r"\W+", " ", question).strip().casefold()
+                if not question or normalized in seen_questions[key]:
+                    continue
+                seen_questions[key].add(normalized)
+                merged[key]["questions"].append({"question": question, "answer": str(qa.get("answer") or "").strip()})
+    return [category for category in merged.values() if category["questions"]]
+
+
+async def generate_faq_map_reduce(
+    text: str,
+    model_client,
+    url: str = "",
+    max_tokens: int = 2000,
+    overlap: int = 200,
+    concurrency: int = 8,
+) -> list[dict]:
+    """Generate FAQs for each chunk concurrently (map) and merge the results locally (reduce).
+
+    With enough concurrency the latency is that of the slowest chunk, not of the whole page. Chunks whose
+    reply can't be parsed are skipped; a ValueError is raised only if every chunk fails.
+    """
+    chunks = chunk_text(text, max_tokens=max_tokens, overlap=overlap, model=model_client.model_info.get("family"))
+    if not chunks:
+        return []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def generate(index: int, chunk: str) -> list[dict]:
+        async with semaphore:
+            prompt = CHUNK_PROMPT.format(index=index + 1, total=len(chunks), url=url or "unknown", text=chunk)
+            result = await model_client.create(
+                [SystemMessage(content=FAQ_SYSTEM_MESSAGE), UserMessage(content=prompt, source="user")]
+            )
+            return parse_faq_json(result.content if isinstance(result.content, str) else str(result.content))
+
+    results = await asyncio.gather(*(generate(i, chunk) for i, chunk in enumerate(chunks)), return_exceptions=True)
+    parts = [r for r in results if not isinstance(r, BaseException)]
+    if not parts:
+        raise ValueError(f"FAQ generation failed for all {len(chunks)} chunks: {results[0]}")
+    return merge_faqs(parts)
+
+
+async def build_faq_for_url(url: str, model_client, **kwargs) -> list[dict]:
+    """Fetch a page and build its FAQ with the chunked map-reduce path instead of an agent conversation."""
+    text = await afetch_url_text(url)
+    if text.startswith("Error:"):
+        raise RuntimeError(text)
+    return await generate_faq_map_reduce(text, model_client, url=url, **kwargs)
@@ -0,0 +1,103 @@
+"""Compare model tierings on a fixed URL set: FAQ quality, latency and cost per tier.
+
+Every tier runs the same team over the same URLs (inputs/tier_urls.txt) with the main model from mvp.py. A run
+counts as valid when its output is a JSON array of categories that all pass the knowledge base schema. The
+recommendation is the cheapest tier, then the fastest, among those with the best valid rate.
+"""
+import os
+import json
+import asyncio
+import argparse
+from statistics import mean, median
+from dotenv import load_dotenv
+from batch import BatchResult, read_urls, run_batch
+from faq_validation import faq_errors
+from model_tiers import TIERS, close_clients, create_role_clients, parse_tiers
+from mvp import create_model_client
+from async_fetch import afetch_url_text, fetcher
+
+# Load environment variables
+load_dotenv()
+
+
+def valid_faq(output: str | None) -> bool:
+    """True when the output holds at least one category and every category matches FAQCategory."""
+    return faq_errors(output or "") is None
+
+
+def summarize(tier: str, assignment: dict, results: list[BatchResult]) -> dict:
+    elapsed = sorted(r.elapsed for r in results if r.ok)
+    return {
+        "tier": tier,
+        "assignment": assignment,
+        "urls": len(results),
+        "valid": sum(1 for r in results if r.ok and valid_faq(r.output)),
+        "failed": sum(1 for r in results if not r.ok),
+        "median_s": round(median(elapsed), 2) if elapsed else None,
+        "mean_s": round(mean(elapsed), 2) if elapsed else None,
+        "model_calls": sum(r.model_calls for r in results),
+        "prompt_tokens": sum(r.prompt_tokens for r in results),
+        "completion_tokens": sum(r.completion_tokens for r in results),
+        "cost_usd": round(sum(r.cost_usd for r in results), 6),
+        "runs": [{"url": r.url, "ok": r.ok, "valid": r.ok and valid_faq(r.output), "elapsed": round(r.elapsed, 2), "error": r.error} for r in results],
+    }
+
+
+def recommend(rows: list[dict]) -> dict | None:
+    """Cheapest, then fastest, of the tiers with the highest number of valid outputs."""
+    best = max((row["valid"] for row in rows), default=0)
+    if not best:
+        return None
+    candidates = [row for row in rows if row["valid"] == best]
+    return min(candidates, key=lambda row: (row["cost_usd"], row["mean_s"] if row["mean_s"] is not None else float("inf")))
+
+
+async def compare(urls: list[str], tiers: list[str], mode: str, concurrency: int, timeout: float) -> list[dict]:
+    model_client = create_model_client()
+    rows = []
+    try:
+        # Fetch every page once so no tier pays for downloads the others read from the fetch cache
+        await asyncio.gather(*(afetch_url_text(url) for url in urls))
+        for tier in tiers:
+            assignment = parse_tiers(tier)
+            role_clients = create_role_clients(assignment)
+            try:
+                results = await run_batch(urls, concurrency, timeout, model_client=model_client, mode=mode, role_clients=role_clients)
+            finally:
+                await close_clients(role_clients.values())
+            rows.append(summarize(tier, assignment, results))
+            print(f"{tier}: {rows[-1]['valid']}/{len(urls)} valid")
+    finally:
+        await model_client.close()
+        await fetcher.aclose()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-role model tierings on a fixed URL set.")
+    parser.add_argument("urls", nargs="?", default="inputs/tier_urls.txt", help="File with one URL per line.")
+    parser.add_argument("--tiers", nargs="+", default=list(TIERS), help="Presets from model_tiers.TIERS or explicit assignments.")
+    parser.add_argument("--mode", choices=["selector", "pipeline"], default="selector", help="Team mode; tiering the selector only matters in selector mode.")
+    parser.add_argument("-c", "--concurrency", type=int, default=2, help="URLs in flight per tier; keep it low so latencies stay comparable.")
+    parser.add_argument("-t", "--timeout", type=float, default=300.0, help="Per-URL timeout in seconds.")
+    parser.add_argument("-o", "--output", default="output/tier_report.json", help="JSON report with per-URL results.")
+    args = parser.parse_args()
+
+    urls = read_urls(args.urls)
+    rows = asyncio.run(compare(urls, args.tiers, args.mode, args.concurrency, args.timeout))
+
+    print(f"\n{'tier':<24} {'valid':>6} {'failed':>6} {'median_s':>9} {'mean_s':>7} {'calls':>6} {'prompt':>9} {'compl':>7} {'cost_usd':>9}")
+    for row in rows:
+        print(f"{row['tier']:<24} {row['valid']:>6} {row['failed']:>6} {str(row['median_s']):>9} {str(row['mean_s']):>7} "
+              f"{row['model_calls']:>6} {row['prompt_tokens']:>9} {row['completion_tokens']:>7} {row['cost_usd']:>9.4f}")
+    choice = recommend(rows)
+    print(f"\nRecommended: {choice['tier']}" if choice else "\nNo tier produced valid FAQ JSON.")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"mode": args.mode, "urls": urls, "tiers": rows, "recommended": choice["tier"] if choice else None}, f, indent=2)
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
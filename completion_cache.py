@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Mapping, Optional, Sequence
+from pydantic import BaseModel
+from autogen_core.models import ChatCompletionClient, CreateResult, RequestUsage
+from autogen_core.tools import Tool
+from model_clients import DelegatingChatCompletionClient
+
+CACHE_MODES = ("passthrough", "record", "replay")
+
+
+class CacheMissError(LookupError):
+    """Raised in replay mode when a completion was never recorded."""
+
+
+class CompletionStore:
+    """SQLite table of serialized CreateResults with least-recently-used eviction above `max_bytes`."""
+
+    def __init__(self, path: str = ".cache/completions.db", max_bytes: int = 512 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS completions_last_access ON completions (last_access);
+        """)
+        self._db.commit()
+
+    def get(self, key: str) -> CreateResult | None:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE completions SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+        return CreateResult.model_validate_json(row[0])
+
+    def put(self, key: str, model: str, result: CreateResult):
+        value = result.model_dump_json()
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO completions (key, model, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, value, len(value), now, now),
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM completions ORDER BY last_access").fetchall():
+            self._db.execute("DELETE FROM completions WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+def completion_key(model: str, messages: Sequence, tools: Sequence, json_output, extra_create_args: Mapping[str, Any]) -> str:
+    """Hash of everything that determines a completion: model, messages, tool schemas and output options."""
+    if isinstance(json_output, type) and issubclass(json_output, BaseModel):
+        json_output = json_output.model_json_schema()
+    data = {
+        "model": model,
+        "messages": [message.model_dump(mode="json") for message in messages],
+        "tools": [tool.schema if isinstance(tool, Tool) else tool for tool in tools],
+        "json_output": json_output,
+        "extra_create_args": dict(extra_create_args),
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class CachingChatCompletionClient(DelegatingChatCompletionClient):
+    """Record/replay cache in front of any model client.
+
+    - record: answer from the cache when possible, otherwise call the model and store the result.
+    - replay: answer only from the cache and raise CacheMissError otherwise; runs are offline and deterministic.
+    - passthrough: always call the model and store nothing.
+    """
+
+    def __init__(self, inner: ChatCompletionClient, store: CompletionStore, mode: str = "record"):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode {mode!r}; expected one of {CACHE_MODES}.")
+        super().__init__(inner)
+        self.store = store
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, messages, tools, json_output, extra_create_args) -> tuple[CreateResult | None, str]:
+        """Hash the request and read its recorded completion; blocking, so callers run it in a worker thread."""
+        key = completion_key(self.model_name, messages, tools, json_output, extra_create_args)
+        if self.mode == "passthrough":
+            return None, key
+        cached = self.store.get(key)
+        if cached is not None:
+            self.hits += 1
+            # A hit costs no tokens; keeping the recorded usage would bill it again in run summaries
+            return cached.model_copy(update={"cached": True, "usage": RequestUsage(prompt_tokens=0, completion_tokens=0)}), key
+        self.misses += 1
+        if self.mode == "replay":
+            raise CacheMissError(f"No recorded completion for {self.model_name} (key {key[:12]}).")
+        return None, key
+
+    async def create(self, messages: Sequence, *, tools=[], json_output=None, extra_create_args: Mapping[str, Any] = {}, cancellation_token: Optional[Any] = None) -> CreateResult:
+        cached, key = await asyncio.to_thread(self._lookup, messages, tools, json_output, extra_create_args)
+        if cached is not None:
+            return cached
+        result = await super().create(
+            messages, tools=tools, json_output=json_output, extra_create_args=extra_create_args, cancellation_token=cancellation_token
+        )
+        if self.mode == "record":
+            await asyncio.to_thread(self.store.put, key, self.model_name, result)
+        return result
+
+    async def create_stream(self, messages: Sequence, *, tools=[], json_output=None, extra_create_args: Mapping[str, Any] = {}, cancellation_token: Optional[Any] = None):
+        cached, key = await asyncio.to_thread(self._lookup, messages, tools, json_output, extra_create_args)
+        if cached is not None:
+            if isinstance(cached.content, str):
+                yield cached.content
+            yield cached
+            return
+        async for chunk in super().create_stream(
+            messages, tools=tools, json_output=json_output, extra_create_args=extra_create_args, cancellation_token=cancellation_token
+        ):
+            if isinstance(chunk, CreateResult) and self.mode == "record":
+                await asyncio.to_thread(self.store.put, key, self.model_name, chunk)
+            yield chunk
+
+
+def with_completion_cache(client: ChatCompletionClient, mode: str | None = None) -> ChatCompletionClient:
+    """Wrap `client` according to COMPLETION_CACHE_MODE (default passthrough, which leaves it unwrapped)."""
+    mode = mode or os.getenv("COMPLETION_CACHE_MODE", "passthrough")
+    if mode == "passthrough":
+        return client
+    store = CompletionStore(
+        path=os.getenv("COMPLETION_CACHE_PATH", ".cache/completions.db"),
+        max_bytes=int(os.getenv("COMPLETION_CACHE_MAX_BYTES", 512 * 1024 * 1024)),
+    )
+    return CachingChatCompletionClient(client, store, mode=mode)
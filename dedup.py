@@ -0,0 +1,154 @@
+import re
+import json
+import random
+import hashlib
+from typing import Sequence
+from autogen_core import CancellationToken
+from autogen_agentchat.agents import BaseChatAgent
+from autogen_agentchat.base import Response
+from autogen_agentchat.messages import BaseChatMessage, TextMessage
+from chunking import parse_faq_json
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_WORD = re.compile(r"\w+")
+
+
+def shingles(text: str, k: int = 2) -> set[int]:
+    """Hashed word k-grams of the normalized text; very short texts fall back to their single words."""
+    words = _WORD.findall(text.casefold())
+    grams = [" ".join(words[i:i + k]) for i in range(len(words) - k + 1)] or words
+    return {int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "little") for g in grams}
+
+
+class NearDuplicateIndex:
+    """MinHash signatures of Q&A pairs, bucketed with LSH so each lookup only compares a handful of candidates.
+
+    A signature has `bands * rows` hash minima; two items become candidates when all rows of any band agree,
+    and count as near-duplicates when their estimated Jaccard similarity reaches `threshold`. Adding and
+    querying cost the same whatever the index size, so deduplicating N items is close to linear.
+    """
+
+    def __init__(self, threshold: float = 0.6, bands: int = 16, rows: int = 4, seed: int = 1):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME)) for _ in range(bands * rows)]
+        self._buckets: dict[tuple, list[int]] = {}
+        self._signatures: list[tuple[int, ...]] = []
+        self._by_source: dict[str, list[int]] = {}
+        self._retired: set[int] = set()
+
+    @classmethod
+    def from_knowledge_base(cls, kb, **kwargs) -> "NearDuplicateIndex":
+        """Seed an index with every Q&A pair the KnowledgeBase currently holds (each source's latest batch)."""
+        index = cls(**kwargs)
+        for record in kb.iter_records(latest_only=True):
+            for qa in record["questions"]:
+                index.add(f"{qa['question']} {qa['answer']}", record["source"])
+        return index
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def signature(self, text: str) -> tuple[int, ...]:
+        hashes = shingles(text)
+        if not hashes:
+            return ()
+        return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._perms)
+
+    def _bands(self, signature: tuple[int, ...]):
+        for band in range(self.bands):
+            yield (band, *signature[band * self.rows:(band + 1) * self.rows])
+
+    def retire(self, source: str) -> None:
+        """Stop matching the entries stored for `source`, so a re-run of a page replaces its old pairs."""
+        self._retired.update(self._by_source.pop(source, ()))
+
+    def find(self, text: str) -> int | None:
+        """Return the id of a stored near-duplicate of `text`, or None."""
+        signature = self.signature(text)
+        if not signature:
+            return None
+        candidates = {item for key in self._bands(signature) for item in self._buckets.get(key, ())}
+        for item in sorted(candidates - self._retired):
+            matches = sum(1 for x, y in zip(signature, self._signatures[item]) if x == y)
+            if matches / len(signature) >= self.threshold:
+                return item
+        return None
+
+    def add(self, text: str, source: str = "") -> int | None:
+        signature = self.signature(text)
+        if not signature:
+            return None
+        item = len(self._signatures)
+        self._signatures.append(signature)
+        self._by_source.setdefault(source, []).append(item)
+        for key in self._bands(signature):
+            self._buckets.setdefault(key, []).append(item)
+        return item
+
+
+def dedup_faqs(faqs: list[dict], index: NearDuplicateIndex, source: str = "") -> tuple[list[dict], int]:
+    """Drop Q&A pairs that near-duplicate an earlier pair in `faqs` or in the index; returns (kept, dropped).
+
+    Kept pairs are added to the index, so later pages are checked against them too. Pairs indexed earlier for
+    the same `source` (a stored or re-run copy of this page) are retired first, so they don't count as
+    duplicates. Categories left without questions, and items that aren't categories, are removed.
+    """
+    if source:
+        index.retire(source)
+    kept, dropped = [], 0
+    for item in faqs:
+        if not isinstance(item, dict):
+            continue
+        questions = []
+        pairs = item.get("questions") or []
+        for qa in pairs if isinstance(pairs, list) else []:
+            if not isinstance(qa, dict):
+                continue
+            text = f"{qa.get('question') or ''} {qa.get('answer') or ''}"
+            if index.find(text) is not None:
+                dropped += 1
+                continue
+            index.add(text, source)
+            questions.append(qa)
+        if questions:
+            kept.append({**item, "questions": questions})
+    return kept, dropped
+
+
+class DeduplicatorAgent(BaseChatAgent):
+    """Non-LLM pipeline stage between the FAQ generator and the verifier.
+
+    It parses the generator's JSON, removes near-duplicate Q&A pairs locally and hands on only the survivors,
+    so the verifier's prompt no longer carries the duplicates. Replies that aren't a JSON array pass through.
+    """
+
+    def __init__(self, index: NearDuplicateIndex, source: str = "", generator: str = "FAQGeneratorAgent", name: str = "DeduplicatorAgent"):
+        super().__init__(name, description="Removes near-duplicate Q&A pairs from the FAQ generator's output.")
+        self.index = index
+        self.source = source
+        self.generator = generator
+        self._latest: str | None = None
+
+    @property
+    def produced_message_types(self) -> Sequence[type[BaseChatMessage]]:
+        return (TextMessage,)
+
+    async def on_messages(self, messages: Sequence[BaseChatMessage], cancellation_token: CancellationToken) -> Response:
+        for message in messages:
+            if message.source == self.generator:
+                self._latest = message.to_text()
+        if self._latest is None:
+            return Response(chat_message=TextMessage(source=self.name, content="Error: no FAQ output to deduplicate."))
+        try:
+            faqs = parse_faq_json(self._latest)
+        except ValueError:
+            return Response(chat_message=TextMessage(source=self.name, content=self._latest))
+        kept, dropped = dedup_faqs(faqs, self.index, self.source)
+        content = json.dumps(kept, indent=2, ensure_ascii=False)
+        return Response(chat_message=TextMessage(source=self.name, content=content, metadata={"dropped": str(dropped)}))
+
+    async def on_reset(self, cancellation_token: CancellationToken) -> None:
+        self._latest = None
@@ -0,0 +1,119 @@
+import re
+import uuid
+from collections import OrderedDict
+from autogen_core.tools import FunctionTool
+from chunking import chunk_text
+from async_fetch import afetch_url_text
+
+SECTION_TOKENS = 800
+LEAD_CHARS = 600
+OUTLINE_SECTIONS = 30
+OUTLINE_WORDS = 10
+_WORD = re.compile(r"\w+")
+
+
+class DocumentStore:
+    """Run-scoped store of fetched page text, split into numbered sections.
+
+    The crawler puts each page here and only a short handle plus summary goes into the group chat, so the page
+    isn't re-sent with every later prompt. Agents pull the sections they need with `read_section` and
+    `search_document`. Only the newest `max_documents` pages are kept, which bounds a reused team's memory.
+    """
+
+    def __init__(self, section_tokens: int = SECTION_TOKENS, max_documents: int = 16):
+        self.section_tokens = section_tokens
+        self.max_documents = max_documents
+        self._documents: OrderedDict[str, dict] = OrderedDict()
+
+    def put(self, url: str, text: str) -> str:
+        handle = f"doc-{uuid.uuid4().hex[:8]}"
+        sections = chunk_text(text, max_tokens=self.section_tokens, overlap=0) or [""]
+        self._documents[handle] = {"url": url, "text": text, "sections": sections}
+        while len(self._documents) > self.max_documents:
+            self._documents.popitem(last=False)
+        return handle
+
+    def save_state(self) -> dict:
+        """The stored pages by handle, oldest first; sections are rebuilt from the text on load."""
+        return {handle: {"url": d["url"], "text": d["text"]} for handle, d in self._documents.items()}
+
+    def load_state(self, state: dict):
+        self._documents = OrderedDict(
+            (handle, {"url": d["url"], "text": d["text"], "sections": chunk_text(d["text"], max_tokens=self.section_tokens, overlap=0) or [""]})
+            for handle, d in state.items()
+        )
+
+    def _get(self, handle: str) -> dict:
+        document = self._documents.get(handle.strip())
+        if document is None:
+            raise KeyError(f"Unknown document handle {handle!r}.")
+        return document
+
+    def summary(self, handle: str) -> str:
+        """Handle, size, the opening of the page and the first words of each section."""
+        document = self._get(handle)
+        sections = document["sections"]
+        lines = [
+            f"Stored {document['url']} as {handle}: {len(document['text'])} characters in {len(sections)} sections (0-{len(sections) - 1}).",
+            f"Opening: {document['text'][:LEAD_CHARS]}",
+            "Sections:",
+        ]
+        for i, section in enumerate(sections[:OUTLINE_SECTIONS]):
+            lines.append(f"{i}: {' '.join(section.split()[:OUTLINE_WORDS])}...")
+        if len(sections) > OUTLINE_SECTIONS:
+            lines.append(f"... {len(sections) - OUTLINE_SECTIONS} more sections")
+        return "\n".join(lines)
+
+    def section(self, handle: str, index: int) -> str:
+        sections = self._get(handle)["sections"]
+        if not 0 <= index < len(sections):
+            raise IndexError(f"{handle} has sections 0-{len(sections) - 1}.")
+        return sections[index]
+
+    def search(self, handle: str, query: str, limit: int = 3) -> list[tuple[int, str]]:
+        """Sections ranked by how many of the query's words they contain, best first."""
+        terms = {w for w in _WORD.findall(query.casefold()) if len(w) > 2 or w.isdigit()}
+        scored = []
+        for i, section in enumerate(self._get(handle)["sections"]):
+            words = _WORD.findall(section.casefold())
+            score = sum(1 for w in words if w in terms)
+            if score:
+                scored.append((score, i, section))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [(i, section) for _, i, section in scored[:limit]]
+
+
+def document_tools(store: DocumentStore) -> tuple[FunctionTool, list[FunctionTool]]:
+    """Return the crawler's fetch tool and the retrieval tools for the other agents, all bound to `store`."""
+
+    async def fetch_document(url: str) -> str:
+        text = await afetch_url_text(url)
+        if text.startswith("Error:"):
+            return text
+        return store.summary(store.put(url, text))
+
+    async def read_section(handle: str, section: int) -> str:
+        try:
+            return f"[{handle} section {section}]\n{store.section(handle, section)}"
+        except (KeyError, IndexError) as e:
+            return f"Error: {e.args[0]}"
+
+    async def search_document(handle: str, query: str) -> str:
+        try:
+            hits = store.search(handle, query)
+        except KeyError as e:
+            return f"Error: {e.args[0]}"
+        if not hits:
+            return f"No section of {handle} matches {query!r}."
+        return "\n\n".join(f"[{handle} section {i}]\n{section}" for i, section in hits)
+
+    fetch_tool = FunctionTool(
+        fetch_document,
+        name="fetch_document",
+        description="Fetch a webpage, store its text and return a document handle with a summary and section outline.",
+    )
+    retrieval_tools = [
+        FunctionTool(read_section, name="read_section", description="Read one numbered section of a stored document."),
+        FunctionTool(search_document, name="search_document", description="Return the sections of a stored document that best match a query."),
+    ]
+    return fetch_tool, retrieval_tools
@@ -0,0 +1,99 @@
+import codecs
+from html.parser import HTMLParser
+from typing import AsyncIterable, Iterable
+
+# Elements whose content is boilerplate rather than page text
+SKIP_TAGS = {"script", "style", "nav", "footer", "aside", "noscript", "template", "svg", "iframe"}
+
+# Elements that don't separate words; every other tag is treated as a word boundary
+INLINE_TAGS = {"a", "abbr", "b", "bdi", "bdo", "cite", "code", "data", "dfn", "em", "i", "kbd", "mark", "q",
+               "s", "samp", "small", "span", "strong", "sub", "sup", "time", "u", "var", "wbr"}
+
+DEFAULT_MAX_CHARS = 200_000
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+
+
+class TextExtractor(HTMLParser):
+    """Single-pass HTML to text extractor that can be fed incrementally.
+
+    Boilerplate elements (SKIP_TAGS) are dropped, whitespace is collapsed while reading, and parsing stops
+    once `max_chars` characters of text have been collected (check `done` between feeds).
+    """
+
+    def __init__(self, max_chars: int = DEFAULT_MAX_CHARS):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.done = False
+        self._parts: list[str] = []
+        self._length = 0
+        self._skip_depth: dict[str, int] = {}
+        self._pending_space = False
+
+    def _skipping(self) -> bool:
+        return any(self._skip_depth.values())
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth[tag] = self._skip_depth.get(tag, 0) + 1
+        elif tag not in INLINE_TAGS:
+            self._pending_space = True
+
+    def handle_startendtag(self, tag, attrs):
+        # Self-closing tags like <br/> never open a skipped region
+        if tag not in INLINE_TAGS:
+            self._pending_space = True
+
+    def handle_endtag(self, tag):
+        if self._skip_depth.get(tag):
+            self._skip_depth[tag] -= 1
+        elif tag not in INLINE_TAGS:
+            self._pending_space = True
+
+    def handle_data(self, data):
+        if self.done or self._skipping():
+            return
+        words = data.split()
+        if not words:
+            self._pending_space = self._pending_space or bool(data)
+            return
+        text = " ".join(words)
+        if self._length and (self._pending_space or data[0].isspace()):
+            text = " " + text
+        self._pending_space = data[-1].isspace()
+
+        remaining = self.max_chars - self._length
+        if len(text) >= remaining:
+            text = text[:remaining]
+            self.done = True
+        self._parts.append(text)
+        self._length += len(text)
+
+    def text(self) -> str:
+        return "".join(self._parts).strip()
+
+
+def extract_text(chunks: Iterable[bytes | str], max_chars: int = DEFAULT_MAX_CHARS, encoding: str = "utf-8") -> str:
+    """Extract readable text from an HTML document given as an iterable of byte or string chunks."""
+    parser = TextExtractor(max_chars=max_chars)
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    for chunk in chunks:
+        parser.feed(decoder.decode(chunk) if isinstance(chunk, bytes) else chunk)
+        if parser.done:
+            break
+    else:
+        parser.feed(decoder.decode(b"", final=True))
+        parser.close()
+    return parser.text()
+
+
+async def aextract_text(chunks: AsyncIterable[bytes], max_chars: int = DEFAULT_MAX_CHARS, encoding: str = "utf-8") -> str:
+    """Async variant of `extract_text` for streamed response bodies, e.g. httpx's `aiter_bytes()`."""
+    parser = TextExtractor(max_chars=max_chars)
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    async for chunk in chunks:
+        parser.feed(decoder.decode(chunk))
+        if parser.done:
+            return parser.text()
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+    return parser.text()
@@ -0,0 +1,133 @@
+from typing import Callable, Sequence
+from pydantic import TypeAdapter, ValidationError
+from autogen_agentchat.agents import BaseChatAgent
+from autogen_agentchat.base import Response, TerminatedException, TerminationCondition
+from autogen_agentchat.messages import BaseAgentEvent, BaseChatMessage, StopMessage, TextMessage
+from autogen_core import CancellationToken
+from chunking import extract_json_array
+from knowledge_base import FAQCategory
+
+FAQ_GENERATOR = "FAQGeneratorAgent"
+VALIDATOR = "SchemaValidatorAgent"
+# The knowledge base the task prompt asks for: a JSON array of categories, each with its Q&A pairs
+FAQ_SCHEMA = TypeAdapter(list[FAQCategory])
+# Schema errors quoted back to the generator; the first few are enough to fix the rest the same way
+MAX_REPORTED_ERRORS = 10
+
+
+def faq_errors(text: str) -> str | None:
+    """Why `text` isn't a complete knowledge base, or None when it holds at least one valid category.
+
+    The whole array is checked, so stray items that aren't categories make it invalid.
+    """
+    try:
+        categories = extract_json_array(text)
+    except ValueError as e:
+        return f"The reply is not a parseable JSON array: {e}"
+    if not categories:
+        return "The JSON array has no categories."
+    try:
+        FAQ_SCHEMA.validate_python(categories)
+    except ValidationError as e:
+        lines = [f"{''.join(f'[{p}]' if isinstance(p, int) else f'.{p}' for p in err['loc'])}: {err['msg']}" for err in e.errors()]
+        return "\n".join(lines[:MAX_REPORTED_ERRORS])
+    return None
+
+
+def faq_sources(names: Sequence[str]) -> list[str]:
+    """The agent whose valid output is the run's final knowledge base: the verifier, which polishes what the
+    generator (checked by RepairRouter on the way) produced; without one, the deduplicator or the generator."""
+    for name in ("VerifierAgent", "DeduplicatorAgent", FAQ_GENERATOR):
+        if name in names:
+            return [name]
+    return []
+
+
+class ValidFAQTermination(TerminationCondition):
+    """Stops the run as soon as one of `sources` replies with a knowledge base that passes FAQ_SCHEMA.
+
+    Only the messages that arrived since the last check are parsed, so each reply is validated once.
+    """
+
+    def __init__(self, sources: Sequence[str]):
+        self.sources = list(sources)
+        self._terminated = False
+
+    @property
+    def terminated(self) -> bool:
+        return self._terminated
+
+    async def __call__(self, messages: Sequence[BaseAgentEvent | BaseChatMessage]) -> StopMessage | None:
+        if self._terminated:
+            raise TerminatedException("Termination condition has already been reached")
+        for message in messages:
+            if isinstance(message, BaseChatMessage) and message.source in self.sources and faq_errors(message.to_text()) is None:
+                self._terminated = True
+                return StopMessage(content=f"Valid FAQ JSON from '{message.source}'", source="ValidFAQTermination")
+        return None
+
+    async def reset(self) -> None:
+        self._terminated = False
+
+
+class SchemaValidatorAgent(BaseChatAgent):
+    """Non-LLM agent that checks the FAQ generator's latest reply against FAQ_SCHEMA.
+
+    RepairRouter calls it when the reply doesn't validate; it answers with the exact errors, so the generator's
+    next turn is a targeted repair instead of another open-ended round.
+    """
+
+    def __init__(self, generator: str = FAQ_GENERATOR, name: str = VALIDATOR):
+        super().__init__(name, description="Checks the FAQ generator's JSON against the knowledge base schema; it is called automatically when the JSON is invalid.")
+        self.generator = generator
+        self._latest: str | None = None
+
+    @property
+    def produced_message_types(self) -> Sequence[type[BaseChatMessage]]:
+        return (TextMessage,)
+
+    async def on_messages(self, messages: Sequence[BaseChatMessage], cancellation_token: CancellationToken) -> Response:
+        for message in messages:
+            if message.source == self.generator:
+                self._latest = message.to_text()
+        if self._latest is None:
+            return Response(chat_message=TextMessage(source=self.name, content=f"Error: no output from {self.generator} to validate."))
+        errors = faq_errors(self._latest)
+        if errors is None:
+            return Response(chat_message=TextMessage(source=self.name, content="The FAQ JSON is valid.", metadata={"valid": "true"}))
+        content = (
+            f"{self.generator}, your last reply is not a valid knowledge base:\n{errors}\n\n"
+            'Reply with only the corrected JSON array of {"category": ..., "questions": [{"question": ..., "answer": ...}]} '
+            "objects, keeping the categories and Q&A pairs that were already correct."
+        )
+        return Response(chat_message=TextMessage(source=self.name, content=content, metadata={"valid": "false"}))
+
+    async def on_reset(self, cancellation_token: CancellationToken) -> None:
+        self._latest = None
+
+
+class RepairRouter:
+    """`selector_func` part that routes an invalid FAQ reply to the validator and the validator's errors back to
+    the generator, at most `max_repairs` times per run. Returns None to leave other turns to the caller."""
+
+    def __init__(self, generator: str = FAQ_GENERATOR, validator: str = VALIDATOR, max_repairs: int = 2):
+        self.generator = generator
+        self.validator = validator
+        self.max_repairs = max_repairs
+
+    def __call__(self, messages: Sequence[BaseAgentEvent | BaseChatMessage]) -> str | None:
+        turns = [m for m in messages if isinstance(m, BaseChatMessage) and m.source != "user"]
+        if not turns:
+            return None
+        last = turns[-1]
+        if last.source == self.validator:
+            return self.generator if last.metadata.get("valid") == "false" else None
+        if last.source == self.generator and faq_errors(last.to_text()) is not None:
+            repairs = sum(1 for t in turns if t.source == self.validator)
+            return self.validator if repairs < self.max_repairs else None
+        return None
+
+    def candidates(self, names: Sequence[str]) -> Callable[[Sequence[BaseAgentEvent | BaseChatMessage]], list[str]]:
+        """`candidate_func` for the same team: the model may pick anyone but the validator, which only this router calls."""
+        allowed = [name for name in names if name != self.validator]
+        return lambda messages: allowed
@@ -0,0 +1,217 @@
+import os
+import asyncio
+import time
+import sqlite3
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Mapping
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """Normalize a URL so trivially different spellings of the same page share a cache entry."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "http"
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    # Fragments never reach the server, so they can't change the content
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    digest: str
+    size: int
+    fetched_at: float
+    etag: str | None
+    last_modified: str | None
+
+
+# A download callable receives the URL and the conditional request headers to send. It returns the cleaned
+# text and the response headers, or (None, headers) when the server answered 304 Not Modified.
+AsyncDownloader = Callable[[str, Mapping[str, str]], Awaitable[tuple[str | None, Mapping[str, str]]]]
+
+
+class FetchCache:
+    """Content-addressed on-disk cache of cleaned page text, keyed by normalized URL.
+
+    Fresh entries (younger than `ttl` seconds) are served straight from disk. Stale entries are revalidated
+    with If-None-Match / If-Modified-Since, so an unchanged page costs a 304 instead of a download and re-parse.
+    The total size of stored text is capped at `max_bytes`; the least recently used URLs are evicted first.
+    """
+
+    def __init__(self, directory: str = ".cache/fetch", ttl: float = 24 * 3600, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(directory, "blobs"), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                etag TEXT,
+                last_modified TEXT
+            );
+            CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+            CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, count INTEGER NOT NULL);
+        """)
+        self._db.commit()
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "blobs", digest[:2], f"{digest}.txt")
+
+    def _bump(self, name: str):
+        self._db.execute(
+            "INSERT INTO stats (name, count) VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET count = count + 1",
+            (name,),
+        )
+
+    def _read_blob(self, digest: str) -> str | None:
+        try:
+            with open(self._blob_path(digest), encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def get(self, url: str) -> CacheEntry | None:
+        """Look up the cache entry for a URL without touching the network."""
+        key = normalize_url(url)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, digest, size, fetched_at, etag, last_modified FROM entries WHERE url = ?", (key,)
+            ).fetchone()
+        return CacheEntry(*row) if row else None
+
+    async def afetch(self, url: str, download: AsyncDownloader) -> str:
+        """Return the cleaned text for `url`, downloading it with the coroutine `download` only when the cache can't answer.
+
+        The SQLite and blob file I/O runs in worker threads so it never blocks the event loop.
+        """
+        key, entry, text, headers = await asyncio.to_thread(self._lookup, url)
+        if text is not None:
+            return text
+        text, response_headers = await download(url, headers)
+        if text is None and entry:
+            cached = await asyncio.to_thread(self._revalidated, key, entry)
+            if cached is not None:
+                return cached
+            text, response_headers = await download(url, {})
+        return await asyncio.to_thread(self._downloaded, key, text, response_headers)
+
+    def _lookup(self, url: str) -> tuple[str, CacheEntry | None, str | None, dict]:
+        """Return the URL's key, its entry, its text when still fresh, and the conditional headers otherwise."""
+        key = normalize_url(url)
+        entry = self.get(key)
+        now = time.time()
+
+        if entry and now - entry.fetched_at < self.ttl:
+            text = self._read_blob(entry.digest)
+            if text is not None:
+                with self._lock:
+                    self._db.execute("UPDATE entries SET last_access = ? WHERE url = ?", (now, key))
+                    self._bump("hits")
+                    self._db.commit()
+                return key, entry, text, {}
+
+        headers = {}
+        if entry:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return key, entry, None, headers
+
+    def _revalidated(self, key: str, entry: CacheEntry) -> str | None:
+        """Serve a 304 Not Modified from the stored blob, or None when the blob is missing."""
+        cached = self._read_blob(entry.digest)
+        if cached is not None:
+            now = time.time()
+            with self._lock:
+                self._db.execute("UPDATE entries SET fetched_at = ?, last_access = ? WHERE url = ?", (now, now, key))
+                self._bump("revalidated")
+                self._db.commit()
+        return cached
+
+    def _downloaded(self, key: str, text: str | None, response_headers: Mapping[str, str]) -> str:
+        with self._lock:
+            self._bump("misses")
+            self._db.commit()
+        if text:
+            self._store(key, text, response_headers.get("ETag"), response_headers.get("Last-Modified"))
+        return text or ""
+
+    def _store(self, key: str, text: str, etag: str | None, last_modified: str | None):
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._lock:
+            previous = self._db.execute("SELECT digest FROM entries WHERE url = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (url, digest, size, fetched_at, last_access, etag, last_modified) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, digest, len(data), now, now, etag, last_modified),
+            )
+            if previous and previous[0] != digest:
+                self._drop_blob_if_unused(previous[0])
+            self._evict()
+            self._db.commit()
+
+    def _drop_blob_if_unused(self, digest: str):
+        if not self._db.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)).fetchone():
+            try:
+                os.remove(self._blob_path(digest))
+            except FileNotFoundError:
+                pass
+
+    def _stored_bytes(self) -> int:
+        # Blobs are shared between URLs with identical content, so count each digest once
+        row = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM entries)").fetchone()
+        return row[0]
+
+    def _evict(self):
+        """Drop least recently used URLs until the stored text fits under max_bytes."""
+        total = self._stored_bytes()
+        if total <= self.max_bytes:
+            return
+        for url, digest in self._db.execute("SELECT url, digest FROM entries ORDER BY last_access").fetchall():
+            self._db.execute("DELETE FROM entries WHERE url = ?", (url,))
+            self._drop_blob_if_unused(digest)
+            self._bump("evictions")
+            total = self._stored_bytes()
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> dict:
+        """Return hit/miss/revalidation/eviction counters plus the current entry count and size."""
+        with self._lock:
+            counters = dict(self._db.execute("SELECT name, count FROM stats").fetchall())
+            entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            stored = self._stored_bytes()
+        return {
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "revalidated": counters.get("revalidated", 0),
+            "evictions": counters.get("evictions", 0),
+            "entries": entries,
+            "bytes": stored,
+        }
@@ -0,0 +1,207 @@
+import os
+import json
+import mmap
+import time
+import asyncio
+import hashlib
+import argparse
+from dataclasses import dataclass, asdict
+from dotenv import load_dotenv
+from extract import extract_text
+from chunking import generate_faq_map_reduce
+from knowledge_base import KnowledgeBase
+from dedup import NearDuplicateIndex, dedup_faqs
+from mvp import create_model_client
+from model_tiers import close_clients
+
+# Load environment variables
+load_dotenv()
+
+TEXT_EXTENSIONS = {".txt", ".md"}
+HTML_EXTENSIONS = {".html", ".htm"}
+# Files above this size are memory-mapped instead of read into a Python bytes object
+MMAP_THRESHOLD = 1024 * 1024
+HTML_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class IngestResult:
+    path: str
+    ok: bool
+    sha256: str
+    elapsed: float
+    faqs: list | None = None
+    error: str | None = None
+
+
+def iter_files(directory: str):
+    """Yield the ingestible files under `directory`, in a stable order."""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in TEXT_EXTENSIONS | HTML_EXTENSIONS:
+                yield os.path.join(root, name)
+
+
+def _with_contents(path: str, func):
+    """Call `func` with the file's bytes, memory-mapping large files so they're paged in on demand."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        if size < MMAP_THRESHOLD:
+            return func(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return func(mapped)
+
+
+def hash_file(path: str) -> str:
+    return _with_contents(path, lambda data: hashlib.sha256(data).hexdigest())
+
+
+def read_text(path: str) -> str:
+    """Read a local document as plain text; HTML goes through the streaming extractor chunk by chunk."""
+    if os.path.splitext(path)[1].lower() in HTML_EXTENSIONS:
+        return _with_contents(path, lambda data: extract_text(
+            (data[i:i + HTML_CHUNK_SIZE] for i in range(0, len(data), HTML_CHUNK_SIZE)), max_chars=len(data)
+        ))
+    return _with_contents(path, lambda data: " ".join(str(data, "utf-8", "replace").split()))
+
+
+class Manifest:
+    """JSON record of every ingested file's size, mtime and content hash, used to skip unchanged files."""
+
+    def __init__(self, path: str = "output/ingest_manifest.json"):
+        self.path = path
+        self.entries: dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def stat_unchanged(self, path: str, stat: os.stat_result) -> bool:
+        entry = self.entries.get(path)
+        return bool(entry) and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime
+
+    def hash_unchanged(self, path: str, digest: str) -> bool:
+        entry = self.entries.get(path)
+        return bool(entry) and entry["sha256"] == digest
+
+    def update(self, path: str, stat: os.stat_result, digest: str):
+        self.entries[path] = {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": digest, "processed_at": time.time()}
+
+
+async def ingest_directory(directory: str, model_client, manifest: Manifest, concurrency: int = 4, on_result=None, dedup_index: NearDuplicateIndex | None = None,
+                           on_removed=None) -> dict:
+    """Generate FAQs for every new or changed file under `directory`.
+
+    Files whose size and mtime match the manifest are skipped without being read; files that were touched but
+    hash the same are skipped after hashing. Only changed files are read and sent to the model, by a pool of
+    `concurrency` workers. Failed files (including ones that vanish or can't be read) stay out of the manifest
+    so the next run retries them; the manifest is saved even if the run is interrupted. With a `dedup_index`,
+    Q&A pairs that near-duplicate another document's are dropped. Files deleted since the last run leave the
+    manifest and are passed to `on_removed`, e.g. to drop their FAQs from the knowledge base.
+    """
+    stats = {"seen": 0, "skipped": 0, "processed": 0, "failed": 0, "removed": 0}
+    semaphore = asyncio.Semaphore(concurrency)
+    seen = set()
+
+    async def process(path: str, stat: os.stat_result):
+        async with semaphore:
+            start = time.perf_counter()
+            digest = ""
+            try:
+                digest = await asyncio.to_thread(hash_file, path)
+                if manifest.hash_unchanged(path, digest):
+                    manifest.update(path, stat, digest)
+                    stats["skipped"] += 1
+                    return
+                text = await asyncio.to_thread(read_text, path)
+                source = f"file://{os.path.abspath(path)}"
+                faqs = await generate_faq_map_reduce(text, model_client, url=source)
+                if dedup_index is not None:
+                    faqs, _ = dedup_faqs(faqs, dedup_index, source)
+                result = IngestResult(path=path, ok=True, sha256=digest, elapsed=time.perf_counter() - start, faqs=faqs)
+                manifest.update(path, stat, digest)
+                stats["processed"] += 1
+            except Exception as e:
+                result = IngestResult(path=path, ok=False, sha256=digest, elapsed=time.perf_counter() - start, error=f"{type(e).__name__}: {e}")
+                stats["failed"] += 1
+            if on_result:
+                on_result(result)
+
+    tasks = []
+    try:
+        for path in iter_files(directory):
+            seen.add(path)
+            stats["seen"] += 1
+            try:
+                stat = os.stat(path)
+            except OSError as e:
+                # Vanished between listing and stat; retried next run like any other failure
+                stats["failed"] += 1
+                if on_result:
+                    on_result(IngestResult(path=path, ok=False, sha256="", elapsed=0.0, error=f"{type(e).__name__}: {e}"))
+                continue
+            if manifest.stat_unchanged(path, stat):
+                stats["skipped"] += 1
+                continue
+            tasks.append(asyncio.create_task(process(path, stat)))
+        await asyncio.gather(*tasks)
+
+        # Forget files that were deleted from this directory since the last run
+        prefix = os.path.join(directory, "")
+        for path in [p for p in manifest.entries if p.startswith(prefix) and p not in seen]:
+            del manifest.entries[path]
+            stats["removed"] += 1
+            if on_removed:
+                on_removed(path)
+    finally:
+        # Keep what the finished files paid for, even when the run is interrupted
+        manifest.save()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build FAQs from local documents, skipping files that haven't changed.")
+    parser.add_argument("directory", nargs="?", default="inputs", help="Directory to ingest (default: inputs).")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Number of files processed at once.")
+    parser.add_argument("--manifest", default="output/ingest_manifest.json", help="Manifest of content hashes from previous runs.")
+    parser.add_argument("-o", "--output", default="output/ingest_results.jsonl", help="JSONL file receiving one result per processed file.")
+    parser.add_argument("--knowledge-base", default="output/knowledge_base.jsonl", help="Append-only store receiving each file's FAQs; deleted files drop out when it is compacted.")
+    args = parser.parse_args()
+
+    manifest = Manifest(args.manifest)
+    kb = KnowledgeBase(args.knowledge_base)
+    dedup_index = NearDuplicateIndex.from_knowledge_base(kb)
+    model_client = create_model_client()
+    with open(args.output, "a", encoding="utf-8") as out:
+        def on_result(result: IngestResult):
+            out.write(json.dumps(asdict(result)) + "\n")
+            out.flush()
+            if result.ok:
+                kb.append(f"file://{os.path.abspath(result.path)}", result.faqs)
+            print(f"[{result.elapsed:6.1f}s] {result.path}: {'ok' if result.ok else 'FAILED (' + result.error + ')'}")
+
+        def on_removed(path: str):
+            kb.remove(f"file://{os.path.abspath(path)}")
+
+        async def run() -> dict:
+            try:
+                return await ingest_directory(args.directory, model_client, manifest, args.concurrency, on_result, dedup_index, on_removed)
+            finally:
+                await close_clients([model_client])
+
+        stats = asyncio.run(run())
+
+    if stats["processed"] or stats["removed"]:
+        kb.compact()
+    print("Seen {seen}, processed {processed}, skipped {skipped} unchanged, failed {failed}, removed {removed}.".format(**stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import uuid
+from typing import Any, AsyncGenerator, Mapping, Optional, Sequence
+from opentelemetry import trace
+from autogen_agentchat.base import TaskResult
+from autogen_agentchat.messages import BaseChatMessage, ToolCallExecutionEvent, ToolCallRequestEvent
+from autogen_core.models import ChatCompletionClient, CreateResult
+from model_clients import DelegatingChatCompletionClient, served_model
+
+tracer = trace.get_tracer("faq_agents")
+
+# USD per million (prompt, completion) tokens, used for cost estimates; unknown models count as free
+MODEL_PRICES = {
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "llama3.2:1b": (0.0, 0.0),
+}
+
+SELECTOR = "Selector"
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+class RunRecorder:
+    """Collects per-turn latency, token and cost records for one team run.
+
+    Records go to an in-memory list (for `summary()`), to a JSONL run log under `log_dir`, and to OpenTelemetry
+    spans parented to a `team_run` span. Wrap each agent's model client with `wrap()` and iterate the team's
+    stream through `track()`.
+    """
+
+    def __init__(self, log_dir: str = "output/runs", run_id: str | None = None):
+        self.log_dir = log_dir
+        self.reset(run_id)
+
+    def reset(self, run_id: str | None = None):
+        """Start a new run, keeping the wrapped clients pointed at this recorder."""
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.records: list[dict] = []
+        self._span = None
+        self._last_message_at: float | None = None
+        self._pending_tools: dict[str, tuple[str, str, float]] = {}
+
+    @classmethod
+    def from_log(cls, run_id: str, log_dir: str = "output/runs") -> "RunRecorder":
+        """Rebuild a finished run's records from its JSONL log, e.g. to show its summary later."""
+        recorder = cls(log_dir=log_dir, run_id=run_id)
+        if os.path.exists(recorder.log_path):
+            with open(recorder.log_path, encoding="utf-8") as f:
+                recorder.records = [json.loads(line) for line in f if line.strip()]
+        return recorder
+
+    @property
+    def log_path(self) -> str:
+        return os.path.join(self.log_dir, f"{self.run_id}.jsonl")
+
+    def record(self, kind: str, **fields: Any):
+        entry = {"run_id": self.run_id, "kind": kind, "ts": time.time(), **fields}
+        self.records.append(entry)
+        os.makedirs(self.log_dir, exist_ok=True)
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def span_context(self):
+        return trace.set_span_in_context(self._span) if self._span is not None else None
+
+    def wrap(self, client: ChatCompletionClient, agent: str) -> "InstrumentedChatCompletionClient":
+        return InstrumentedChatCompletionClient(client, self, agent)
+
+    def observe(self, message):
+        """Record turn wall time and tool-call durations from a message yielded by `team.run_stream`."""
+        now = time.perf_counter()
+        source = getattr(message, "source", "Unknown")
+        if isinstance(message, ToolCallRequestEvent):
+            for call in message.content:
+                self._pending_tools[call.id] = (source, call.name, now)
+        elif isinstance(message, ToolCallExecutionEvent):
+            for result in message.content:
+                agent, name, started = self._pending_tools.pop(result.call_id, (source, result.name, now))
+                self.record("tool_call", agent=agent, tool=name, duration=now - started, is_error=result.is_error)
+        elif isinstance(message, BaseChatMessage):
+            if self._last_message_at is not None and source != "user":
+                self.record("turn", agent=source, wall_time=now - self._last_message_at)
+            self._last_message_at = now
+
+    async def track(self, stream: AsyncGenerator) -> AsyncGenerator:
+        """Pass a `team.run_stream(...)` through unchanged while recording it under a `team_run` span."""
+        self._span = tracer.start_span("team_run", attributes={"run.id": self.run_id})
+        self._last_message_at = time.perf_counter()
+        started = self._last_message_at
+        try:
+            async for message in stream:
+                if isinstance(message, TaskResult):
+                    self._span.set_attribute("run.stop_reason", message.stop_reason or "")
+                else:
+                    self.observe(message)
+                yield message
+        finally:
+            self.record("run", wall_time=time.perf_counter() - started)
+            self._span.end()
+
+    def summary(self) -> list[dict]:
+        """Per-agent breakdown of the current run; the Selector row is the speaker-selection overhead."""
+        rows: dict[str, dict] = {}
+
+        def row(agent: str) -> dict:
+            return rows.setdefault(agent, {
+                "agent": agent, "turns": 0, "wall_s": 0.0, "model_calls": 0, "model_s": 0.0, "ttft_s": 0.0,
+                "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0, "tool_calls": 0, "tool_s": 0.0,
+            })
+
+        for r in self.records:
+            if r["kind"] == "turn":
+                row(r["agent"])["turns"] += 1
+                row(r["agent"])["wall_s"] += r["wall_time"]
+            elif r["kind"] == "model_call":
+                summary = row(r["agent"])
+                summary["model_calls"] += 1
+                summary["model_s"] += r["wall_time"]
+                summary["ttft_s"] += r["ttft"]
+                summary["prompt_tokens"] += r["prompt_tokens"]
+                summary["completion_tokens"] += r["completion_tokens"]
+                summary["cost_usd"] += r["cost_usd"]
+            elif r["kind"] == "tool_call":
+                row(r["agent"])["tool_calls"] += 1
+                row(r["agent"])["tool_s"] += r["duration"]
+
+        for summary in rows.values():
+            # Report the mean time-to-first-token rather than the sum
+            summary["ttft_s"] = summary["ttft_s"] / summary["model_calls"] if summary["model_calls"] else 0.0
+            for key in ("wall_s", "model_s", "ttft_s", "tool_s"):
+                summary[key] = round(summary[key], 3)
+            summary["cost_usd"] = round(summary["cost_usd"], 6)
+        return list(rows.values())
+
+    def totals(self) -> dict:
+        rows = self.summary()
+        return {
+            "model_calls": sum(r["model_calls"] for r in rows),
+            "prompt_tokens": sum(r["prompt_tokens"] for r in rows),
+            "completion_tokens": sum(r["completion_tokens"] for r in rows),
+            "cost_usd": round(sum(r["cost_usd"] for r in rows), 6),
+        }
+
+
+class InstrumentedChatCompletionClient(DelegatingChatCompletionClient):
+    """Model client wrapper that records every call made on behalf of one agent (or the selector)."""
+
+    def __init__(self, inner: ChatCompletionClient, recorder: RunRecorder, agent: str):
+        super().__init__(inner)
+        self.recorder = recorder
+        self.agent = agent
+
+    def _finish(self, span, started: float, first_token_at: float | None, result: CreateResult | None):
+        ended = time.perf_counter()
+        prompt_tokens = result.usage.prompt_tokens if result else 0
+        completion_tokens = result.usage.completion_tokens if result else 0
+        model = served_model(self, result)
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        fields = {
+            "agent": self.agent,
+            "model": model,
+            "wall_time": ended - started,
+            "ttft": (first_token_at or ended) - started,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cost_usd": cost,
+            "cached": bool(result and result.cached),
+        }
+        self.recorder.record("model_call", **fields)
+        span.set_attributes({f"llm.{k}": v for k, v in fields.items()})
+        span.end()
+
+    async def create(self, messages: Sequence, *, tools=[], json_output=None, extra_create_args: Mapping[str, Any] = {}, cancellation_token: Optional[Any] = None) -> CreateResult:
+        span = tracer.start_span(f"chat {self.agent}", context=self.recorder.span_context())
+        started = time.perf_counter()
+        result = None
+        try:
+            result = await super().create(
+                messages, tools=tools, json_output=json_output, extra_create_args=extra_create_args, cancellation_token=cancellation_token
+            )
+            return result
+        finally:
+            self._finish(span, started, None, result)
+
+    async def create_stream(self, messages: Sequence, *, tools=[], json_output=None, extra_create_args: Mapping[str, Any] = {}, cancellation_token: Optional[Any] = None):
+        span = tracer.start_span(f"chat {self.agent}", context=self.recorder.span_context())
+        started = time.perf_counter()
+        first_token_at = None
+        result = None
+        try:
+            async for chunk in super().create_stream(
+                messages, tools=tools, json_output=json_output, extra_create_args=extra_create_args, cancellation_token=cancellation_token
+            ):
+                if isinstance(chunk, CreateResult):
+                    result = chunk
+                elif first_token_at is None:
+                    first_token_at = time.perf_counter()
+                yield chunk
+        finally:
+            self._finish(span, started, first_token_at, result)
@@ -0,0 +1,142 @@
+import time
+import uuid
+import asyncio
+import threading
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Sequence
+from autogen_core import CancellationToken
+from autogen_agentchat.base import TaskResult
+
+# A job factory receives the job's cancellation token and returns the stream to consume, e.g.
+# lambda token: team.run_stream(task=task, cancellation_token=token)
+JobFactory = Callable[[CancellationToken], AsyncIterator[Any]]
+
+
+@dataclass
+class Job:
+    id: str
+    status: str = "queued"  # queued, running, done, failed, cancelled
+    messages: list = field(default_factory=list)
+    result: TaskResult | None = None
+    error: str | None = None
+    metadata: dict = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+
+class JobRunner:
+    """Runs agent teams in the background on one long-lived event loop thread.
+
+    At most `max_concurrent` jobs run at once; the rest wait in the queue. The caller (typically a Streamlit
+    script) submits a job, gets its id back immediately and polls `get()` for progress, so the UI thread never
+    blocks on a run and widget interactions don't cancel it. Only the newest `max_finished` finished jobs are kept.
+    `on_shutdown` coroutines run on the loop when `shutdown()` stops it, e.g. to close clients bound to the loop.
+    """
+
+    def __init__(self, max_concurrent: int = 4, max_finished: int = 200, on_shutdown: Sequence[Callable[[], Awaitable[Any]]] = ()):
+        self.max_concurrent = max_concurrent
+        self.max_finished = max_finished
+        self.on_shutdown = list(on_shutdown)
+        self._jobs: dict[str, Job] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._tokens: dict[str, CancellationToken] = {}
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._thread = threading.Thread(target=self._loop.run_forever, name="job-runner", daemon=True)
+        self._thread.start()
+
+    def submit(self, factory: JobFactory, **metadata) -> str:
+        """Queue a job and return its id."""
+        job = Job(id=uuid.uuid4().hex[:12], metadata=metadata)
+        token = CancellationToken()
+        with self._lock:
+            self._jobs[job.id] = job
+            self._tokens[job.id] = token
+            self._prune()
+        asyncio.run_coroutine_threadsafe(self._run(job, factory, token), self._loop)
+        return job.id
+
+    async def _run(self, job: Job, factory: JobFactory, token: CancellationToken):
+        self._tasks[job.id] = asyncio.current_task()
+        try:
+            async with self._semaphore:
+                if token.is_cancelled():
+                    raise asyncio.CancelledError()
+                job.status = "running"
+                job.started_at = time.time()
+                async for message in factory(token):
+                    job.messages.append(message)
+                    if isinstance(message, TaskResult):
+                        job.result = message
+            job.status = "done"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "cancelled" if token.is_cancelled() else "failed"
+            job.error = f"{type(e).__name__}: {e}"
+        finally:
+            job.finished_at = time.time()
+            self._tokens.pop(job.id, None)
+            self._tasks.pop(job.id, None)
+
+    def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Request cancellation; the job moves to `cancelled` once the team notices."""
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return False
+        # Neither the token nor the task is thread-safe, so cancel from the loop that owns the job
+        self._loop.call_soon_threadsafe(self._cancel_in_loop, job_id)
+        return True
+
+    def _cancel_in_loop(self, job_id: str):
+        token = self._tokens.get(job_id)
+        if token is not None:
+            token.cancel()
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+
+    def unfinished(self) -> list[Job]:
+        """Every session's jobs that are queued or running."""
+        return [job for job in list(self._jobs.values()) if not job.finished]
+
+    def active(self) -> int:
+        """Number of jobs queued or running."""
+        return len(self.unfinished())
+
+    def _prune(self):
+        finished = sorted((j for j in self._jobs.values() if j.finished), key=lambda j: j.finished_at or 0)
+        for job in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job.id]
+
+    async def _cleanup(self):
+        for hook in self.on_shutdown:
+            try:
+                await hook()
+            except Exception:
+                pass
+
+    def shutdown(self):
+        for job_id in list(self._tokens):
+            self.cancel(job_id)
+        try:
+            asyncio.run_coroutine_threadsafe(self._cleanup(), self._loop).result(timeout=5)
+        except TimeoutError:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
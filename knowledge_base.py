@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import uuid
+import argparse
+import threading
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+
+
+class QAPair(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+    question: str = Field(min_length=1)
+    answer: str = Field(min_length=1)
+
+
+class FAQCategory(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+    category: str = Field(min_length=1)
+    questions: list[QAPair] = Field(min_length=1)
+
+
+def category_key(name: str) -> str:
+    return " ".join(name.split()).casefold()
+
+
+class KnowledgeBase:
+    """Append-only JSONL store of validated FAQ categories with a side index for lookups.
+
+    Every appended category becomes one line in `path`. The side index (`<path>.idx`) is append-only too: one
+    `[offset, category key, source, batch]` line per record. Looking up a category or source reads only the
+    index and the matching lines. `compact()` writes the consolidated knowledge_base.json, keeping only the
+    latest batch per source; `remove()` appends an empty batch (an index line with offset -1) so a source
+    drops out. Memory use while appending stays constant, whatever the number of URLs.
+    """
+
+    def __init__(self, path: str = "output/knowledge_base.jsonl"):
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        for p in (self.path, self.index_path):
+            open(p, "a").close()
+        self._repair_index()
+
+    def _read_index(self):
+        with open(self.index_path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _repair_index(self):
+        """Index any records appended after the last index line, e.g. when a run crashed between the two writes."""
+        last_offset = -1
+        for entry in self._read_index():
+            if entry[0] >= 0:
+                last_offset = entry[0]
+        with open(self.path, "rb") as data, open(self.index_path, "a", encoding="utf-8") as index:
+            if last_offset >= 0:
+                data.seek(last_offset)
+                data.readline()
+            while True:
+                offset = data.tell()
+                line = data.readline()
+                if not line:
+                    break
+                if not line.endswith(b"\n"):
+                    # A torn final write; drop it so the next append starts on a clean line
+                    data.close()
+                    with open(self.path, "r+b") as f:
+                        f.truncate(offset)
+                    break
+                record = json.loads(line)
+                index.write(json.dumps([offset, category_key(record["category"]), record["source"], record["batch"]]) + "\n")
+
+    def append(self, source: str, faqs: list[dict]) -> int:
+        """Validate and append one source's categories as a new batch. Returns the number of records written.
+
+        Categories that fail validation are skipped rather than failing the whole batch.
+        """
+        batch = uuid.uuid4().hex[:12]
+        written = 0
+        with self._lock, open(self.path, "ab") as data, open(self.index_path, "a", encoding="utf-8") as index:
+            for item in faqs:
+                try:
+                    category = FAQCategory.model_validate(item)
+                except ValidationError:
+                    continue
+                record = {"source": source, "batch": batch, "ts": time.time(), **category.model_dump()}
+                offset = data.tell()
+                data.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+                data.flush()
+                index.write(json.dumps([offset, category_key(category.category), source, batch]) + "\n")
+                written += 1
+        return written
+
+    def remove(self, source: str):
+        """Drop a source from the compacted knowledge base by making an empty batch its latest."""
+        with self._lock, open(self.index_path, "a", encoding="utf-8") as index:
+            index.write(json.dumps([-1, None, source, uuid.uuid4().hex[:12]]) + "\n")
+
+    def _latest_batches(self) -> dict[str, str]:
+        latest_batch: dict[str, str] = {}
+        for offset, key, source, batch in self._read_index():
+            latest_batch[source] = batch
+        return latest_batch
+
+    def _read_at(self, offsets: list[int]) -> list[dict]:
+        records = []
+        with open(self.path, "rb") as data:
+            for offset in sorted(offsets):
+                data.seek(offset)
+                records.append(json.loads(data.readline()))
+        return records
+
+    def iter_records(self, latest_only: bool = False):
+        """Stream every stored record in append order; with `latest_only`, just those `compact()` would keep."""
+        latest_batch = self._latest_batches() if latest_only else None
+        with open(self.path, "rb") as data:
+            for line in data:
+                record = json.loads(line)
+                if latest_batch is None or latest_batch.get(record["source"]) == record["batch"]:
+                    yield record
+
+    def by_category(self, name: str) -> list[dict]:
+        key = category_key(name)
+        return self._read_at([entry[0] for entry in self._read_index() if entry[1] == key])
+
+    def by_source(self, source: str) -> list[dict]:
+        return self._read_at([entry[0] for entry in self._read_index() if entry[2] == source and entry[0] >= 0])
+
+    def compact(self, output: str = "output/knowledge_base.json") -> int:
+        """Write the consolidated knowledge base, one entry per category, and return the number of categories.
+
+        Only the latest batch of each source is kept, and repeated questions within a category are dropped.
+        Categories are read one at a time through the index, so memory is bounded by the largest category.
+        """
+        latest_batch = self._latest_batches()
+        offsets_by_category: dict[str, list[int]] = {}
+        for offset, key, source, batch in self._read_index():
+            if latest_batch[source] == batch and offset >= 0:
+                offsets_by_category.setdefault(key, []).append(offset)
+
+        tmp_path = f"{output}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            out.write("[\n")
+            for n, offsets in enumerate(offsets_by_category.values()):
+                records = self._read_at(offsets)
+                seen = set()
+                questions = []
+                for record in records:
+                    for qa in record["questions"]:
+                        normalized = " ".join(qa["question"].split()).casefold()
+                        if normalized not in seen:
+                            seen.add(normalized)
+                            questions.append({**qa, "source": record["source"]})
+                entry = {"category": records[0]["category"], "questions": questions}
+                out.write((",\n" if n else "") + json.dumps(entry, ensure_ascii=False, indent=4))
+            out.write("\n]\n")
+        os.replace(tmp_path, output)
+        return len(offsets_by_category)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query or compact the FAQ knowledge base.")
+    parser.add_argument("--store", default="output/knowledge_base.jsonl", help="Path of the JSONL store.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    compact = commands.add_parser("compact", help="Write the consolidated knowledge_base.json.")
+    compact.add_argument("-o", "--output", default="output/knowledge_base.json")
+    commands.add_parser("category", help="Show the records of one category.").add_argument("name")
+    commands.add_parser("source", help="Show the records of one source URL.").add_argument("url")
+    args = parser.parse_args()
+
+    kb = KnowledgeBase(args.store)
+    if args.command == "compact":
+        print(f"Wrote {kb.compact(args.output)} categories to {args.output}")
+    else:
+        records = kb.by_category(args.name) if args.command == "category" else kb.by_source(args.url)
+        print(json.dumps(records, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
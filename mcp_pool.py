@@ -0,0 +1,143 @@
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, List, Mapping
+from autogen_core import CancellationToken
+from autogen_core.tools import ToolResult, ToolSchema
+from autogen_ext.tools.mcp import McpServerParams, McpWorkbench
+
+
+class PooledMcpWorkbench(McpWorkbench):
+    """McpWorkbench that caches `list_tools` and times its startup and tool calls.
+
+    AssistantAgent asks its workbench for the tool list before every model call; the cached schema makes that
+    free after the first time. The cache is dropped whenever the server is restarted.
+    """
+
+    def __init__(self, server_params: McpServerParams):
+        super().__init__(server_params)
+        self._tools: List[ToolSchema] | None = None
+        self.start_time: float | None = None
+        self.call_times: list[float] = []
+        self.list_tools_hits = 0
+
+    @property
+    def alive(self) -> bool:
+        actor = self._actor
+        return actor is not None and actor._active and actor._actor_task is not None and not actor._actor_task.done()
+
+    async def start(self) -> None:
+        """Spawn and connect to the server, then fetch the tool list so the session is ready for its first call."""
+        started = time.perf_counter()
+        await super().start()
+        await self.list_tools()
+        self.start_time = time.perf_counter() - started
+
+    async def stop(self) -> None:
+        self._tools = None
+        if self._actor is not None:
+            await super().stop()
+
+    async def list_tools(self) -> List[ToolSchema]:
+        if self._tools is None:
+            self._tools = await super().list_tools()
+        else:
+            self.list_tools_hits += 1
+        return self._tools
+
+    async def call_tool(self, name: str, arguments: Mapping[str, Any] | None = None, cancellation_token: CancellationToken | None = None) -> ToolResult:
+        started = time.perf_counter()
+        result = await super().call_tool(name, arguments, cancellation_token)
+        self.call_times.append(time.perf_counter() - started)
+        return result
+
+    async def ping(self, timeout: float) -> bool:
+        """Round-trip a real list_tools request, bypassing the cache."""
+        try:
+            await asyncio.wait_for(McpWorkbench.list_tools(self), timeout)
+            return True
+        except Exception:
+            return False
+
+
+class McpWorkbenchPool:
+    """Keeps `size` MCP server sessions alive across tasks and lends them to agents.
+
+    A workbench is checked before it's handed out and restarted if its session died; `health_check_interval`
+    additionally pings idle sessions in the background. `stats()` compares cold starts with warm tool calls.
+    """
+
+    def __init__(self, server_params: McpServerParams, size: int = 2, health_check_interval: float | None = 30.0, ping_timeout: float = 5.0):
+        self.server_params = server_params
+        self.size = size
+        self.health_check_interval = health_check_interval
+        self.ping_timeout = ping_timeout
+        self.restarts = 0
+        self._workbenches: list[PooledMcpWorkbench] = []
+        self._idle: asyncio.Queue[PooledMcpWorkbench] = asyncio.Queue()
+        self._health_task: asyncio.Task | None = None
+
+    async def start(self):
+        self._workbenches = [PooledMcpWorkbench(self.server_params) for _ in range(self.size)]
+        await asyncio.gather(*(wb.start() for wb in self._workbenches))
+        for wb in self._workbenches:
+            self._idle.put_nowait(wb)
+        if self.health_check_interval:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def close(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+        await asyncio.gather(*(wb.stop() for wb in self._workbenches), return_exceptions=True)
+
+    async def __aenter__(self) -> "McpWorkbenchPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _restart(self, wb: PooledMcpWorkbench):
+        try:
+            await wb.stop()
+        except Exception:
+            # A dead session may fail to shut down cleanly; it's being replaced anyway
+            wb._actor = None
+        await wb.start()
+        self.restarts += 1
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            # Only idle workbenches are checked so a ping never interleaves with an agent's calls
+            for _ in range(self._idle.qsize()):
+                wb = self._idle.get_nowait()
+                try:
+                    if not wb.alive or not await wb.ping(self.ping_timeout):
+                        await self._restart(wb)
+                finally:
+                    self._idle.put_nowait(wb)
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Borrow a live workbench for the duration of a task, e.g. `AssistantAgent(workbench=wb)`."""
+        wb = await self._idle.get()
+        try:
+            if not wb.alive:
+                await self._restart(wb)
+            yield wb
+        finally:
+            self._idle.put_nowait(wb)
+
+    def stats(self) -> dict:
+        """Cold start latency (what spawning a server per run costs before its first call) versus warm tool calls, in ms."""
+        starts = [wb.start_time for wb in self._workbenches if wb.start_time is not None]
+        warm_calls = sorted(t for wb in self._workbenches for t in wb.call_times)
+        return {
+            "sessions": len(self._workbenches),
+            "restarts": self.restarts,
+            "cold_start_ms": round(1000 * sum(starts) / len(starts), 1) if starts else None,
+            "warm_calls": len(warm_calls),
+            "warm_call_p50_ms": round(1000 * warm_calls[len(warm_calls) // 2], 1) if warm_calls else None,
+            "list_tools_cache_hits": sum(wb.list_tools_hits for wb in self._workbenches),
+        }
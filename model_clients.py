@@ -0,0 +1,134 @@
+import os
+from typing import Any, AsyncGenerator, Mapping, Optional, Sequence, Union
+from pydantic import BaseModel
+from autogen_core import CancellationToken
+from autogen_core.models import (
+    ChatCompletionClient,
+    CreateResult,
+    LLMMessage,
+    ModelCapabilities,  # type: ignore
+    ModelInfo,
+    RequestUsage,
+)
+from autogen_core.tools import Tool, ToolSchema
+
+
+def client_model_name(client: ChatCompletionClient) -> str:
+    """Best-effort model name of a client, looking through wrappers, for logs, prices and cache keys."""
+    if isinstance(client, DelegatingChatCompletionClient):
+        return client.model_name
+    create_args = getattr(client, "_create_args", None) or {}
+    return str(create_args.get("model") or getattr(client, "_model", None) or client.model_info.get("family", "unknown"))
+
+
+class ServedCreateResult(CreateResult):
+    """CreateResult from a client that picks a model per call (a provider pool), naming the model that answered."""
+    model: str
+
+
+def served_model(client: ChatCompletionClient, result: CreateResult | None) -> str:
+    """The model that produced `result`: the one a pool reported, otherwise the client's own."""
+    return result.model if isinstance(result, ServedCreateResult) else client_model_name(client)
+
+
+class DelegatingChatCompletionClient(ChatCompletionClient):
+    """Base class for wrappers that add behaviour around another ChatCompletionClient.
+
+    Every method forwards to `inner`; subclasses override `create` / `create_stream` and can be stacked, so a
+    wrapper works with any of the clients this repo uses (Azure OpenAI, Gemini through OpenAI, Ollama).
+    """
+
+    def __init__(self, inner: ChatCompletionClient):
+        self.inner = inner
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        json_output: Optional[bool | type[BaseModel]] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        return await self.inner.create(
+            messages,
+            tools=tools,
+            json_output=json_output,
+            extra_create_args=extra_create_args,
+            cancellation_token=cancellation_token,
+        )
+
+    def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        json_output: Optional[bool | type[BaseModel]] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        return self.inner.create_stream(
+            messages,
+            tools=tools,
+            json_output=json_output,
+            extra_create_args=extra_create_args,
+            cancellation_token=cancellation_token,
+        )
+
+    async def close(self) -> None:
+        await self.inner.close()
+
+    def actual_usage(self) -> RequestUsage:
+        return self.inner.actual_usage()
+
+    def total_usage(self) -> RequestUsage:
+        return self.inner.total_usage()
+
+    def count_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self.inner.count_tokens(messages, tools=tools)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self.inner.remaining_tokens(messages, tools=tools)
+
+    @property
+    def capabilities(self) -> ModelCapabilities:  # type: ignore
+        return self.inner.capabilities  # type: ignore
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return self.inner.model_info
+
+    @property
+    def model_name(self) -> str:
+        """Best-effort model name of the innermost client, for logs and cache keys."""
+        return client_model_name(self.inner)
+
+
+PROVIDERS = ("Gemini", "Azure", "Ollama")
+
+
+def create_client(provider: str, model: str | None = None, **kwargs) -> ChatCompletionClient:
+    """Create a model client for one of PROVIDERS from the environment; `model` overrides its default model.
+
+    Extra keyword arguments go to the client, e.g. max_retries=0 when a scheduler handles retries itself.
+    """
+    # Imported here so a process only loads the SDKs of the providers it uses
+    if provider == "Azure":
+        from autogen_ext.models.openai import AzureOpenAIChatCompletionClient
+        model = model or os.getenv("AZURE_OPENAI_API_MODEL") or os.getenv("OPENAI_API_MODEL")
+        return AzureOpenAIChatCompletionClient(
+            azure_deployment=model,
+            model=model,
+            api_version=os.getenv("AZURE_OPENAI_API_VERSION") or os.getenv("OPENAI_API_VERSION"),
+            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+            api_key=os.getenv("AZURE_OPENAI_KEY"),
+            **kwargs,
+        )
+    if provider == "Gemini":
+        from autogen_ext.models.openai import OpenAIChatCompletionClient
+        return OpenAIChatCompletionClient(model=model or "gemini-2.0-flash", api_key=os.getenv("GEMINI_API_KEY"), api_type="gemini", **kwargs)
+    if provider == "Ollama":
+        from autogen_ext.models.ollama import OllamaChatCompletionClient
+        kwargs.pop("max_retries", None)
+        return OllamaChatCompletionClient(model=model or os.getenv("OLLAMA_MODEL", "llama3.2:1b"), **kwargs)
+    raise ValueError(f"Unknown provider {provider!r}; expected one of {PROVIDERS}.")
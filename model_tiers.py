@@ -0,0 +1,49 @@
+import asyncio
+from typing import Iterable, Mapping
+from autogen_core.models import ChatCompletionClient
+from model_clients import PROVIDERS, create_client
+from completion_cache import with_completion_cache
+from instrumentation import SELECTOR
+
+# Role -> "Provider" or "Provider:model" for the roles that move off the team's main model; the main model
+# keeps every role a tier leaves out (FAQ generation always stays on it in these presets)
+TIERS = {
+    "single": {},
+    "small-selector": {SELECTOR: "Ollama"},
+    "small-selector-indexer": {SELECTOR: "Ollama", "IndexerAgent": "Ollama"},
+    "small-support": {SELECTOR: "Ollama", "ProjectPlanner": "Ollama", "CrawlerAgent": "Ollama", "IndexerAgent": "Ollama"},
+}
+ROLES = [SELECTOR, "ProjectPlanner", "CrawlerAgent", "IndexerAgent", "FAQGeneratorAgent", "VerifierAgent"]
+
+
+def parse_tiers(spec: str | None) -> dict[str, str]:
+    """Read a tier preset name, or explicit assignments like "Selector=Ollama,IndexerAgent=Ollama:llama3.2:3b"."""
+    spec = (spec or "").strip()
+    if not spec or spec in TIERS:
+        return dict(TIERS.get(spec or "single"))
+    tiers = {}
+    for assignment in spec.split(","):
+        role, _, target = assignment.partition("=")
+        role, target = role.strip(), target.strip()
+        if role not in ROLES or target.split(":", 1)[0] not in PROVIDERS:
+            raise ValueError(f"Invalid model tier {assignment!r}; expected <role>=<provider>[:<model>] with a role in {ROLES} "
+                             f"and a provider in {PROVIDERS}, or one of the presets {list(TIERS)}.")
+        tiers[role] = target
+    return tiers
+
+
+def create_role_clients(tiers: Mapping[str, str], cache_mode: str | None = None) -> dict[str, ChatCompletionClient]:
+    """Create the clients for a tier assignment; roles sharing a provider and model share one client."""
+    clients: dict[str, ChatCompletionClient] = {}
+    role_clients = {}
+    for role, target in tiers.items():
+        if target not in clients:
+            provider, _, model = target.partition(":")
+            clients[target] = with_completion_cache(create_client(provider, model or None), cache_mode)
+        role_clients[role] = clients[target]
+    return role_clients
+
+
+async def close_clients(clients: Iterable[ChatCompletionClient]):
+    """Close each distinct client once; roles on the same model share a client."""
+    await asyncio.gather(*(client.close() for client in {id(c): c for c in clients}.values()))
@@ -1,114 +1,171 @@
 import os
-import re
+import json
 import asyncio
-from bs4 import BeautifulSoup
+from typing import Mapping
 from dotenv import load_dotenv
 from azure.identity import DefaultAzureCredential
-from langchain.tools import Tool
-from langchain_community.document_loaders import WebBaseLoader
 from autogen_ext.auth.azure import AzureTokenProvider
 from autogen_ext.models.openai import AzureOpenAIChatCompletionClient
+from autogen_core.models import ChatCompletionClient
+from autogen_core.model_context import BufferedChatCompletionContext
 from autogen_agentchat.agents import AssistantAgent
 from autogen_agentchat.conditions import MaxMessageTermination, TextMentionTermination
 from autogen_agentchat.teams import SelectorGroupChat
 from autogen_agentchat.ui import Console
-from autogen_ext.tools.langchain import LangChainToolAdapter
+from document_store import DocumentStore, document_tools
+from pipeline import create_pipeline_team
+from chunking import build_faq_for_url
+from instrumentation import RunRecorder, SELECTOR
+from completion_cache import with_completion_cache
+from scheduler import create_scheduled_client
+from model_tiers import close_clients, create_role_clients, parse_tiers
+from checkpoint import Checkpointer
+from dedup import DeduplicatorAgent, NearDuplicateIndex, dedup_faqs
+from faq_validation import RepairRouter, SchemaValidatorAgent, ValidFAQTermination, faq_sources
+from async_fetch import fetcher
 
 # Load environment variables
 load_dotenv()
 
 # Initialize the model client
-model_client = AzureOpenAIChatCompletionClient(  
-    azure_deployment=os.getenv("AZURE_OPENAI_API_MODEL"),
-    model=os.getenv("AZURE_OPENAI_API_MODEL"),  
-    api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),      
-    api_key=os.getenv("AZURE_OPENAI_KEY") 
-)  
-
-# Creating a tool
-def clean_text(text: str) -> str:
-    """Remove unnecessary characters and whitespace."""
-    return re.sub(r'\s+', ' ', text).strip()
-
-def fetch_url_text_tool(url: str) -> str:
-    """Fetch and clean the main text content from a webpage."""
-    try:
-        loader = WebBaseLoader(url)
-        docs = loader.load()
-        if docs and docs[0].page_content.strip():
-            soup = BeautifulSoup(docs[0].page_content, "html.parser")
-            return clean_text(soup.get_text())
-        return "Error: No content found at the provided URL."
-    except Exception as e:
-        return f"Error: Failed to fetch content from the URL. Details: {str(e)}"
-
-# Wrap the function in a LangChain Tool
-fetch_url_text_tool_wrapped = Tool(
-    name="fetch_url_text",
-    func=fetch_url_text_tool,
-    description="Fetch the main text content from a webpage."
-)
-fetch_url_text = LangChainToolAdapter(fetch_url_text_tool_wrapped)
+def create_model_client() -> ChatCompletionClient:
+    """Create the Azure OpenAI chat client used by every agent in the team.
+
+    COMPLETION_CACHE_MODE=record|replay puts the SQLite completion cache in front of it. With MODEL_PROVIDERS
+    set (e.g. "Azure,Gemini"), calls are scheduled over that pool of providers instead.
+    """
+    if os.getenv("MODEL_PROVIDERS"):
+        return with_completion_cache(create_scheduled_client())
+    return with_completion_cache(AzureOpenAIChatCompletionClient(  
+        azure_deployment=os.getenv("AZURE_OPENAI_API_MODEL"),
+        model=os.getenv("AZURE_OPENAI_API_MODEL"),  
+        api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
+        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),      
+        api_key=os.getenv("AZURE_OPENAI_KEY") 
+    ))
 
 # Define agents
-project_planner = AssistantAgent(
-    name="ProjectPlanner",
-    model_client=model_client,
-    description="An agent for planning tasks.",
-    system_message=
-        """You are a planning agent. You only plan and delegate tasks - you do not execute them yourself.
-        You can engage team members multiple times to ensure a perfect Joke is provided. 
-        Your team members are CrawlerAgent, IndexerAgent, FAQGeneratorAgent, and VerifierAgent. 
-        After assigning tasks, wait for responses from the agents, handover tasks between agents if needed, and ensure all subtasks are completed. 
-        "After all tasks are complete, summarize the findings and end with 'TERMINATE'. Do not mention 'TERMINATE' before that."""
-    
-)
-
-crawler = AssistantAgent(
-    name="CrawlerAgent",
-    model_client=model_client,
-    system_message="You are responsible for extracting useful text from a given URL using the fetch_url_text tool.",
-    tools=[fetch_url_text]
-)
-
-indexer = AssistantAgent(
-    name="IndexerAgent",
-    model_client=model_client,
-    system_message="You organize content into tagged categories and prepare it for Q&A generation."
-)
-
-FAQ_generator = AssistantAgent(
-    name="FAQGeneratorAgent",
-    model_client=model_client,
-    system_message="You generate helpful Q&A pairs for each category."
-)
-
-verifier = AssistantAgent(
-    name="VerifierAgent",
-    model_client=model_client,
-    system_message="You polish, deduplicate, and validate the final Q&A content."
-)
-
-# Define termination conditions
-termination = TextMentionTermination("TERMINATE") | MaxMessageTermination(max_messages=10)
+def create_agents(model_client, recorder: RunRecorder | None = None, dedup_index: NearDuplicateIndex | None = None, source: str = "",
+                  role_clients: Mapping[str, ChatCompletionClient] | None = None, documents: DocumentStore | None = None) -> list:
+    """Create a fresh set of agents; agents keep conversation state, so every team needs its own.
+
+    With a recorder, each agent's model calls are instrumented under the agent's name. With a dedup index, a
+    DeduplicatorAgent strips near-duplicate Q&A pairs before the verifier, which then only sees its output.
+    The crawler stores page text in a DocumentStore shared by this team (`documents`, or a new one); the chat only carries its handle and
+    summary, and the indexer and FAQ generator read the sections they need. `role_clients` gives individual
+    agents their own (e.g. smaller) model; the others use `model_client`. A SchemaValidatorAgent sends the
+    FAQ generator the schema errors of invalid JSON.
+    """
+    fetch_document, retrieval_tools = document_tools(documents if documents is not None else DocumentStore())
+
+    def client_for(agent: str):
+        client = (role_clients or {}).get(agent, model_client)
+        return recorder.wrap(client, agent) if recorder else client
+
+    project_planner = AssistantAgent(
+        name="ProjectPlanner",
+        model_client=client_for("ProjectPlanner"),
+        description="An agent for planning tasks.",
+        system_message=
+            """You are a planning agent. You only plan and delegate tasks - you do not execute them yourself.
+            You can engage team members multiple times to ensure a perfect Joke is provided. 
+            Your team members are CrawlerAgent, IndexerAgent, FAQGeneratorAgent, and VerifierAgent. 
+            After assigning tasks, wait for responses from the agents, handover tasks between agents if needed, and ensure all subtasks are completed. 
+            "After all tasks are complete, summarize the findings and end with 'TERMINATE'. Do not mention 'TERMINATE' before that."""
+        
+    )
+
+    crawler = AssistantAgent(
+        name="CrawlerAgent",
+        model_client=client_for("CrawlerAgent"),
+        system_message="You are responsible for extracting useful text from a given URL using the fetch_document tool. "
+                       "It stores the page and returns a document handle with a summary; pass the handle on, not the page text.",
+        tools=[fetch_document]
+    )
+
+    indexer = AssistantAgent(
+        name="IndexerAgent",
+        model_client=client_for("IndexerAgent"),
+        system_message="You organize content into tagged categories and prepare it for Q&A generation. "
+                       "Read the stored page with read_section and search_document using its document handle, and list the section numbers each category draws on.",
+        tools=retrieval_tools,
+        reflect_on_tool_use=True,
+    )
+
+    FAQ_generator = AssistantAgent(
+        name="FAQGeneratorAgent",
+        model_client=client_for("FAQGeneratorAgent"),
+        system_message="You generate helpful Q&A pairs for each category. "
+                       "Read the sections listed for each category with read_section (or search_document) using the document handle.",
+        tools=retrieval_tools,
+        reflect_on_tool_use=True,
+    )
+
+    verifier = AssistantAgent(
+        name="VerifierAgent",
+        model_client=client_for("VerifierAgent"),
+        system_message="You polish, deduplicate, and validate the final Q&A content. "
+                       "Reply with only the final JSON array of categories.",
+        # Behind the deduplicator, the verifier only needs the surviving Q&A pairs, not the whole thread
+        model_context=BufferedChatCompletionContext(buffer_size=1) if dedup_index is not None else None,
+    )
+
+    if dedup_index is not None:
+        return [project_planner, crawler, indexer, FAQ_generator, SchemaValidatorAgent(), DeduplicatorAgent(dedup_index, source), verifier]
+    return [project_planner, crawler, indexer, FAQ_generator, SchemaValidatorAgent(), verifier]
 
 # Define the team
-team = SelectorGroupChat(
-    [project_planner, crawler, indexer, FAQ_generator, verifier],
-    termination_condition=termination,
-    model_client=model_client,
-    allow_repeated_speaker=True,
-)
+def create_team(model_client, mode: str = "selector", recorder: RunRecorder | None = None, dedup_index: NearDuplicateIndex | None = None, source: str = "",
+                role_clients: Mapping[str, ChatCompletionClient] | None = None, checkpointer: Checkpointer | None = None) -> SelectorGroupChat:
+    """Create an independent FAQ team; teams can share a model client but not agents.
+
+    mode="selector" lets the model pick every speaker; mode="pipeline" runs the fixed
+    Crawler -> Indexer -> FAQGenerator -> Verifier order without selector calls. In pipeline mode a
+    `dedup_index` adds local near-duplicate removal before the verifier, checked against other pages
+    (`source` is the page's URL). `role_clients` maps agent names, and SELECTOR for speaker selection, to
+    their own model clients (see model_tiers.py). A `checkpointer` saves the team's state before every turn so
+    an interrupted run can be resumed. Either mode stops as soon as the verifier replies with valid FAQ JSON;
+    invalid JSON from the FAQ generator is sent back for repair before it reaches the verifier.
+    """
+    selector_client = (role_clients or {}).get(SELECTOR, model_client)
+    selector_client = recorder.wrap(selector_client, SELECTOR) if recorder else selector_client
+    documents = DocumentStore()
+    if checkpointer is not None:
+        checkpointer.documents = documents
+    if mode == "pipeline":
+        return create_pipeline_team(create_agents(model_client, recorder, dedup_index, source, role_clients, documents), selector_client, checkpointer=checkpointer)
+    agents = create_agents(model_client, recorder, role_clients=role_clients, documents=documents)
+
+    # Define termination conditions
+    termination = (
+        ValidFAQTermination(faq_sources([agent.name for agent in agents]))
+        | TextMentionTermination("TERMINATE")
+        | MaxMessageTermination(max_messages=10)
+    )
+
+    repair = RepairRouter()
+    team = SelectorGroupChat(
+        agents,
+        termination_condition=termination,
+        model_client=selector_client,
+        # Checkpoints first, routes schema repairs, and leaves every other choice to the model
+        selector_func=checkpointer.selector_func(repair) if checkpointer else repair,
+        candidate_func=repair.candidates([agent.name for agent in agents]),
+        allow_repeated_speaker=True,
+    )
+    if checkpointer is not None:
+        checkpointer.team = team
+    return team
 
 # Define the task
-url = "https://plus.maths.org/content/ridiculously-brief-introduction-quantum-mechanics"
-task = f"""
+def build_task(url: str) -> str:
+    """Build the knowledge base task prompt for a single URL."""
+    return f"""
     Please build a structured knowledge base from the following URL:
 
     {url}
 
-    Use the fetch_url_text tool to retrieve the content, then analyze it.
+    Use the fetch_document tool to retrieve the content, then analyze it.
 
     Break down into categories and generate Q&A pairs like in JSON format:
     [
@@ -122,9 +179,30 @@ task = f"""
     ]
 """
 
+url = "https://plus.maths.org/content/ridiculously-brief-introduction-quantum-mechanics"
+
 # Main function
 async def main():
-    await Console(team.run_stream(task=task))
+    model_client = create_model_client()
+    # MODEL_TIERS moves some roles to smaller models, e.g. MODEL_TIERS=small-selector-indexer
+    role_clients = create_role_clients(parse_tiers(os.getenv("MODEL_TIERS")))
+    recorder = RunRecorder()
+    mode = os.getenv("TEAM_MODE", "selector")
+    try:
+        if mode == "map-reduce":
+            faqs = await build_faq_for_url(url, recorder.wrap(role_clients.get("FAQGeneratorAgent", model_client), "FAQGeneratorAgent"))
+            print(json.dumps(dedup_faqs(faqs, NearDuplicateIndex(), url)[0], indent=2))
+        else:
+            team = create_team(model_client, mode=mode, recorder=recorder, dedup_index=NearDuplicateIndex(), source=url, role_clients=role_clients)
+            await Console(recorder.track(team.run_stream(task=build_task(url))))
+    finally:
+        await close_clients([model_client, *role_clients.values()])
+        await fetcher.aclose()
+
+    # Per-agent latency, token and cost breakdown
+    for row in recorder.summary():
+        print(row)
+    print(f"Run log written to {recorder.log_path}")
 
 # Run the main function
 if __name__ == "__main__":
@@ -0,0 +1,105 @@
+from typing import Sequence
+from autogen_agentchat.base import ChatAgent
+from autogen_agentchat.conditions import MaxMessageTermination, SourceMatchTermination, TextMentionTermination
+from autogen_agentchat.messages import BaseAgentEvent, BaseChatMessage
+from autogen_agentchat.teams import SelectorGroupChat
+from checkpoint import Checkpointer
+from faq_validation import VALIDATOR, RepairRouter, ValidFAQTermination, faq_sources
+
+# The order the FAQ job always runs in; DeduplicatorAgent is optional and skipped when the team doesn't have one
+PIPELINE_STAGES = ["CrawlerAgent", "IndexerAgent", "FAQGeneratorAgent", "DeduplicatorAgent", "VerifierAgent"]
+PLANNER = "ProjectPlanner"
+
+
+def stage_failed(message: BaseChatMessage) -> bool:
+    """A stage fails when it produces no text or surfaces an error string (e.g. from the fetch tool)."""
+    text = message.to_text().strip()
+    return not text or text.startswith("Error:")
+
+
+class PipelineSelector:
+    """Deterministic `selector_func` for SelectorGroupChat that walks PIPELINE_STAGES in order.
+
+    It always returns a speaker name, so the team never asks the model who should speak next. The planner is
+    only brought in when a stage fails; after the planner has spoken, the failed stage gets another turn, up to
+    `max_retries` times. With a `repair` router, FAQ JSON that fails the schema goes to the validator and back
+    to the generator before the pipeline moves on. Routing is derived from the message thread alone, so it
+    survives `team.reset()` and saved/loaded state.
+    """
+
+    def __init__(self, stages: Sequence[str] = PIPELINE_STAGES, planner: str = PLANNER, max_retries: int = 1, repair: RepairRouter | None = None):
+        self.stages = list(stages)
+        self.planner = planner
+        self.max_retries = max_retries
+        self.repair = repair
+
+    def __call__(self, messages: Sequence[BaseAgentEvent | BaseChatMessage]) -> str:
+        speaker = self.repair(messages) if self.repair else None
+        if speaker is not None:
+            return speaker
+        turns = [m for m in messages if isinstance(m, BaseChatMessage) and m.source != "user"]
+        if not turns:
+            return self.stages[0]
+
+        last = turns[-1]
+        if last.source in self.stages:
+            if stage_failed(last):
+                return self.planner
+            position = self.stages.index(last.source)
+            # After the final stage the planner only has to summarize; termination normally stops the run first
+            return self.stages[position + 1] if position + 1 < len(self.stages) else self.planner
+
+        # The planner spoke: give the failed stage another go if it has retries left, otherwise leave the
+        # planner to wrap up (the run is still bounded by the message limit)
+        last_stage = next((t for t in reversed(turns) if t.source in self.stages), None)
+        if last_stage is not None and stage_failed(last_stage):
+            failures = sum(1 for t in turns if t.source == last_stage.source and stage_failed(t))
+            return last_stage.source if failures <= self.max_retries else self.planner
+        completed = {t.source for t in turns if t.source in self.stages and not stage_failed(t)}
+        return next((s for s in self.stages if s not in completed), self.planner)
+
+
+def create_pipeline_team(agents: Sequence[ChatAgent], model_client, max_messages: int = 10, checkpointer: Checkpointer | None = None) -> SelectorGroupChat:
+    """Create a team that runs the agents as a fixed Crawler -> Indexer -> FAQGenerator -> Verifier pipeline.
+
+    `model_client` is only required by SelectorGroupChat's constructor; the pipeline selector never defers to it.
+    When the agents include a DeduplicatorAgent it runs between the FAQ generator and the verifier. When they
+    include a SchemaValidatorAgent, invalid JSON from the generator gets repair turns before the pipeline moves
+    on. With a `checkpointer`, the team's state is checkpointed before every stage.
+    """
+    names = {agent.name for agent in agents}
+    stages = [stage for stage in PIPELINE_STAGES if stage in names]
+    termination = (
+        SourceMatchTermination([PIPELINE_STAGES[-1]])
+        | TextMentionTermination("TERMINATE")
+        | MaxMessageTermination(max_messages=max_messages)
+    )
+    if VALIDATOR in names:
+        termination = ValidFAQTermination(faq_sources(stages)) | termination
+    selector = PipelineSelector(stages, repair=RepairRouter() if VALIDATOR in names else None)
+    team = SelectorGroupChat(
+        agents,
+        termination_condition=termination,
+        model_client=model_client,
+        selector_func=checkpointer.selector_func(selector) if checkpointer else selector,
+        allow_repeated_speaker=True,
+    )
+    if checkpointer is not None:
+        checkpointer.team = team
+    return team
+
+
+def selector_calls_saved(messages: Sequence[BaseAgentEvent | BaseChatMessage]) -> int:
+    """Number of selector model calls a pipeline run avoided: one per agent turn the model would have picked.
+
+    Validator and deduplicator turns, and the generator's repair turns after the validator, don't count: a
+    selector-mode team routes those without a model call too.
+    """
+    saved, repair = 0, False
+    for m in messages:
+        if not isinstance(m, BaseChatMessage) or m.source == "user":
+            continue
+        if m.source not in (VALIDATOR, "DeduplicatorAgent") and not repair:
+            saved += 1
+        repair = m.source == VALIDATOR and m.metadata.get("valid") == "false"
+    return saved
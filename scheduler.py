@@ -0,0 +1,298 @@
+import os
+import time
+import random
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Mapping, Optional, Sequence
+import httpx
+import openai
+from autogen_core.models import ChatCompletionClient, CreateResult, ModelFamily, ModelInfo
+from model_clients import DelegatingChatCompletionClient, ServedCreateResult, client_model_name, create_client
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Refills `rate` units per second up to `capacity`; `acquire` waits until the requested amount is available."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0):
+        # A request larger than the bucket would never fit; let it through once the bucket is full
+        amount = min(amount, self.capacity)
+        # The lock keeps waiters in arrival order
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+
+
+@dataclass
+class Provider:
+    """One model endpoint in the pool with its request and token rate limits (per minute; None for unlimited)."""
+    name: str
+    client: ChatCompletionClient
+    requests_per_minute: float | None = None
+    tokens_per_minute: float | None = None
+    latencies: deque = field(default_factory=lambda: deque(maxlen=1000))
+    calls: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    hedges: int = 0
+    in_flight: int = 0
+    cooldown_until: float = 0.0
+
+    def __post_init__(self):
+        self.request_bucket = TokenBucket(self.requests_per_minute / 60, self.requests_per_minute) if self.requests_per_minute else None
+        self.token_bucket = TokenBucket(self.tokens_per_minute / 60, self.tokens_per_minute) if self.tokens_per_minute else None
+
+    def percentile(self, q: float) -> float | None:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    @property
+    def cooling_down(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+
+def status_code(error: BaseException) -> int | None:
+    """HTTP status of a provider error, whichever SDK raised it (openai, httpx, ollama)."""
+    code = getattr(error, "status_code", None)
+    if code is None:
+        code = getattr(getattr(error, "response", None), "status_code", None)
+    return code if isinstance(code, int) and code > 0 else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, (openai.APIConnectionError, httpx.TransportError, ConnectionError, asyncio.TimeoutError)):
+        return True
+    return status_code(error) in RETRYABLE_STATUS
+
+
+def retry_after(error: BaseException) -> float | None:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class SchedulingChatCompletionClient(DelegatingChatCompletionClient):
+    """Spreads model calls over a pool of providers, respecting each provider's request and token budgets.
+
+    Calls go to the first provider (in priority order) that isn't cooling down after a 429. A 429, 5xx,
+    timeout or connection error is retried with full-jitter exponential backoff on the next provider, up to
+    `max_attempts` times. With `hedge_quantile` set, a call still running past that latency quantile of its
+    provider gets a second, hedged request on another provider and the first answer wins. When every provider
+    is cooling down, the call waits for the first cooldown to end.
+
+    Results are ServedCreateResults naming the model that answered, so costs are priced per call; `model_name`
+    (and with it the completion cache key) names the whole pool. `model_info` only claims the features every
+    provider supports, while token counting (`count_tokens`) comes from the first provider.
+    """
+
+    def __init__(self, providers: Sequence[Provider], max_attempts: int = 4, backoff_base: float = 0.5, backoff_max: float = 20.0,
+                 hedge_quantile: float | None = None, hedge_min_samples: int = 20):
+        if not providers:
+            raise ValueError("At least one provider is required.")
+        super().__init__(providers[0].client)
+        self.providers = list(providers)
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.queue_depth = 0
+
+    @property
+    def model_name(self) -> str:
+        return "pool:" + ",".join(client_model_name(p.client) for p in self.providers)
+
+    @property
+    def model_info(self) -> ModelInfo:
+        infos = [p.client.model_info for p in self.providers]
+        merged = {}
+        for key, value in infos[0].items():
+            values = [info.get(key) for info in infos]
+            if isinstance(value, bool):
+                merged[key] = all(values)
+            else:
+                merged[key] = value if all(v == value for v in values) else ModelFamily.UNKNOWN
+        return merged  # type: ignore
+
+    def _pick(self, attempt: int, exclude: Provider | None = None) -> Provider:
+        candidates = [p for p in self.providers if p is not exclude] or self.providers
+        ready = [p for p in candidates if not p.cooling_down] or sorted(candidates, key=lambda p: p.cooldown_until)
+        # Rotate through the ready providers on retries so a failing endpoint isn't hit twice in a row
+        return ready[attempt % len(ready)]
+
+    @staticmethod
+    def _estimate_tokens(messages: Sequence, tools) -> int:
+        # About four characters per token is close enough for budgeting, and unlike a tokenizer it costs nothing
+        return (sum(len(str(getattr(m, "content", ""))) for m in messages) + sum(len(str(t)) for t in tools)) // 4
+
+    async def _admit(self, provider: Provider, tokens: int):
+        """Wait out the provider's cooldown, then its request and token budgets; waiting calls count towards the queue depth."""
+        self.queue_depth += 1
+        try:
+            while provider.cooling_down:
+                await asyncio.sleep(provider.cooldown_until - time.monotonic())
+            if provider.request_bucket:
+                await provider.request_bucket.acquire(1)
+            if provider.token_bucket:
+                await provider.token_bucket.acquire(tokens)
+        finally:
+            self.queue_depth -= 1
+
+    async def _call(self, provider: Provider, tokens: int, messages, kwargs) -> CreateResult:
+        await self._admit(provider, tokens)
+        provider.in_flight += 1
+        started = time.perf_counter()
+        try:
+            result = await provider.client.create(messages, **kwargs)
+        except Exception as e:
+            provider.errors += 1
+            if status_code(e) == 429:
+                provider.rate_limited += 1
+                provider.cooldown_until = time.monotonic() + (retry_after(e) or self.backoff_base)
+            raise
+        finally:
+            provider.in_flight -= 1
+        provider.calls += 1
+        provider.latencies.append(time.perf_counter() - started)
+        return self._served(provider, result)
+
+    @staticmethod
+    def _served(provider: Provider, result: CreateResult) -> ServedCreateResult:
+        return ServedCreateResult(**dict(result), model=client_model_name(provider.client))
+
+    async def _call_hedged(self, provider: Provider, attempt: int, tokens: int, messages, kwargs) -> CreateResult:
+        delay = provider.percentile(self.hedge_quantile) if self.hedge_quantile and len(provider.latencies) >= self.hedge_min_samples else None
+        if delay is None:
+            return await self._call(provider, tokens, messages, kwargs)
+        primary = asyncio.ensure_future(self._call(provider, tokens, messages, kwargs))
+        pending = {primary}
+        error = None
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+            backup_provider = self._pick(attempt, exclude=provider)
+            backup_provider.hedges += 1
+            pending.add(asyncio.ensure_future(self._call(backup_provider, tokens, messages, kwargs)))
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def create(self, messages: Sequence, *, tools=[], json_output=None, extra_create_args: Mapping[str, Any] = {}, cancellation_token: Optional[Any] = None) -> CreateResult:
+        kwargs = {"tools": tools, "json_output": json_output, "extra_create_args": extra_create_args, "cancellation_token": cancellation_token}
+        tokens = self._estimate_tokens(messages, tools)
+        for attempt in range(self.max_attempts):
+            provider = self._pick(attempt)
+            try:
+                return await self._call_hedged(provider, attempt, tokens, messages, kwargs)
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_attempts - 1:
+                    raise
+                await asyncio.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+
+    async def create_stream(self, messages: Sequence, *, tools=[], json_output=None, extra_create_args: Mapping[str, Any] = {}, cancellation_token: Optional[Any] = None):
+        """Stream from one provider; failures before the first chunk are retried like `create`, later ones aren't."""
+        tokens = self._estimate_tokens(messages, tools)
+        for attempt in range(self.max_attempts):
+            provider = self._pick(attempt)
+            await self._admit(provider, tokens)
+            provider.in_flight += 1
+            started = time.perf_counter()
+            yielded = False
+            try:
+                async for chunk in provider.client.create_stream(
+                    messages, tools=tools, json_output=json_output, extra_create_args=extra_create_args, cancellation_token=cancellation_token
+                ):
+                    yielded = True
+                    yield self._served(provider, chunk) if isinstance(chunk, CreateResult) else chunk
+                provider.calls += 1
+                provider.latencies.append(time.perf_counter() - started)
+                return
+            except Exception as e:
+                provider.errors += 1
+                if status_code(e) == 429:
+                    provider.rate_limited += 1
+                    provider.cooldown_until = time.monotonic() + (retry_after(e) or self.backoff_base)
+                if yielded or not is_retryable(e) or attempt == self.max_attempts - 1:
+                    raise
+            finally:
+                provider.in_flight -= 1
+            await asyncio.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+
+    async def close(self) -> None:
+        await asyncio.gather(*(p.client.close() for p in self.providers), return_exceptions=True)
+
+    def metrics(self) -> dict:
+        """Queue depth plus per-provider call counts and p50/p99 latency in milliseconds."""
+        def ms(value):
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            "queue_depth": self.queue_depth,
+            "providers": {
+                p.name: {
+                    "calls": p.calls,
+                    "errors": p.errors,
+                    "rate_limited": p.rate_limited,
+                    "hedges": p.hedges,
+                    "in_flight": p.in_flight,
+                    "p50_ms": ms(p.percentile(0.50)),
+                    "p99_ms": ms(p.percentile(0.99)),
+                }
+                for p in self.providers
+            },
+        }
+
+
+def create_scheduled_client(names: Sequence[str] | None = None) -> SchedulingChatCompletionClient:
+    """Build a scheduler over the providers in MODEL_PROVIDERS (comma-separated, in priority order).
+
+    Without MODEL_PROVIDERS, the pool holds Azure and Gemini when their credentials are set, then Ollama.
+
+    Per-provider limits come from <PROVIDER>_RPM and <PROVIDER>_TPM, e.g. GEMINI_RPM=15; HEDGE_QUANTILE
+    (e.g. 0.95) turns on hedged requests. The SDKs' own retries are disabled so only the scheduler retries.
+    """
+    if names is None and os.getenv("MODEL_PROVIDERS"):
+        names = [n.strip() for n in os.getenv("MODEL_PROVIDERS").split(",") if n.strip()]
+    elif names is None:
+        # Default to every provider with credentials configured, plus the local Ollama server
+        names = [n for n, key in (("Azure", "AZURE_OPENAI_ENDPOINT"), ("Gemini", "GEMINI_API_KEY"), ("Ollama", None)) if key is None or os.getenv(key)]
+    providers = []
+    for name in names:
+        rpm, tpm = os.getenv(f"{name.upper()}_RPM"), os.getenv(f"{name.upper()}_TPM")
+        providers.append(Provider(
+            name=name,
+            client=create_client(name, max_retries=0),
+            requests_per_minute=float(rpm) if rpm else None,
+            tokens_per_minute=float(tpm) if tpm else None,
+        ))
+    hedge = os.getenv("HEDGE_QUANTILE")
+    return SchedulingChatCompletionClient(providers, hedge_quantile=float(hedge) if hedge else None)
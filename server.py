@@ -1,17 +1,42 @@
 # server.py
+import os
+import json
+import asyncio
+import argparse
+from functools import cache
+from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
+# One pooled HTTP client for every fetch, whichever client session asked for it
+from async_fetch import afetch_url_text, fetcher
+from chunking import generate_faq_map_reduce
+
+# Load environment variables
+load_dotenv()
 
 # Create an MCP server
 mcp = FastMCP(
-    # Define the server address and port
-    address="localhost",
-    port=5000,
     # Define the server name and description
-    name="DemoServer",
-    description="A simple MCP server for demonstration purposes",
+    name="FAQServer",
+    instructions="Fetches webpages and builds categorized FAQ knowledge bases from them.",
+    # Define the server address and port (used by the network transport)
+    host=os.getenv("MCP_HOST", "localhost"),
+    port=int(os.getenv("MCP_PORT", 5000)),
 )
 
 
+# At most this many FAQ builds run at once; further requests wait for a slot
+MAX_PIPELINE_JOBS = int(os.getenv("MAX_PIPELINE_JOBS", 4))
+pipeline_slots = asyncio.Semaphore(MAX_PIPELINE_JOBS)
+jobs = {"running": 0, "waiting": 0, "done": 0, "failed": 0}
+
+
+@cache
+def get_model_client():
+    # Imported here so fetch-only servers don't need model credentials
+    from mvp import create_model_client
+    return create_model_client()
+
+
 # Add an addition tool
 @mcp.tool()
 def add(a: int, b: int) -> int:
@@ -19,15 +44,67 @@ def add(a: int, b: int) -> int:
     return a + b
 
 
+@mcp.tool()
+async def fetch_url_text(url: str) -> str:
+    """Fetch and clean the main text content from a webpage."""
+    return await afetch_url_text(url)
+
+
+@mcp.tool()
+async def build_faq(url: str) -> str:
+    """Build a knowledge base of categorized Q&A pairs for a webpage, returned as a JSON array."""
+    jobs["waiting"] += 1
+    try:
+        await pipeline_slots.acquire()
+    finally:
+        # Also when the request is cancelled while it waits for a slot
+        jobs["waiting"] -= 1
+    jobs["running"] += 1
+    try:
+        text = await fetcher.fetch_text(url)
+        if not text:
+            raise RuntimeError("No content found at the provided URL.")
+        faqs = await generate_faq_map_reduce(text, get_model_client(), url=url)
+        jobs["done"] += 1
+        return json.dumps(faqs, ensure_ascii=False)
+    except Exception as e:
+        jobs["failed"] += 1
+        return f"Error: Failed to build the FAQ. Details: {str(e)}"
+    finally:
+        jobs["running"] -= 1
+        pipeline_slots.release()
+
+
 # Add a dynamic greeting resource
 @mcp.resource("greeting://{name}")
 def get_greeting(name: str) -> str:
     """Get a personalized greeting"""
     return f"Hello, {name}!"
 
+
+@mcp.resource("stats://server")
+def get_stats() -> str:
+    """FAQ job counters and fetch cache statistics"""
+    return json.dumps({"jobs": jobs, "max_pipeline_jobs": MAX_PIPELINE_JOBS, "fetch_cache": fetcher.cache.stats()})
+
+
+async def serve(transport: str):
+    """Run the server on this loop, closing the pooled fetch client when it stops."""
+    async with fetcher:
+        if transport == "sse":
+            await mcp.run_sse_async()
+        else:
+            await mcp.run_stdio_async()
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the FAQ MCP server.")
+    parser.add_argument("--transport", choices=["stdio", "sse"], default=os.getenv("MCP_TRANSPORT", "stdio"),
+                        help="stdio for a per-client subprocess, sse to serve many clients over HTTP.")
+    args = parser.parse_args()
     try:# Start the MCP server
-        mcp.run()
-        print("MCP server is running...")
+        if args.transport == "sse":
+            print(f"MCP server listening on http://{mcp.settings.host}:{mcp.settings.port}{mcp.settings.sse_path}")
+        asyncio.run(serve(args.transport))
     except Exception as e:
-        print(f"Error starting MCP server: {e}")
\ No newline at end of file
+        print(f"Error starting MCP server: {e}")
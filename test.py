@@ -2,12 +2,13 @@ from autogen_agentchat.agents import AssistantAgent
 from autogen_agentchat.teams import RoundRobinGroupChat
 from autogen_agentchat.messages import TextMessage
 from autogen_ext.models.openai import OpenAIChatCompletionClient
-from autogen_ext.tools.mcp import McpWorkbench, StdioServerParams
+from autogen_ext.tools.mcp import StdioServerParams
 import asyncio
 import os
 from dotenv import load_dotenv
 from autogen_agentchat.ui import Console
 from autogen_agentchat.conditions import MaxMessageTermination, TextMentionTermination
+from mcp_pool import McpWorkbenchPool
 
 
 load_dotenv()
@@ -22,9 +23,19 @@ model_client = OpenAIChatCompletionClient(
 # Update the fetch tool to connect to the MCP server defined in server.py
 fetch_mcp_server = StdioServerParams(command="python", args=["server.py"])
 
-async def main():
-    # Create an MCP workbench which provides a session to the MCP server.
-    async with McpWorkbench(fetch_mcp_server) as workbench:  # type: ignore
+# Short calculator tasks; they share warm server sessions instead of spawning server.py for each one
+tasks = [
+    """
+        Hellow my name is Jaimon. Can you please help me add 100 and 20.
+
+        """,
+    "Hi, I'm Priya. What is 250 plus 175?",
+    "Hello! Please add 7 and 35 for me.",
+]
+
+async def run_task(pool, task):
+    # Borrow a live MCP session for this task; it goes back to the pool afterwards
+    async with pool.acquire() as workbench:
         # Create the calculator agent (uses MCP tools)
         calculator_agent = AssistantAgent(
             name="calculator",
@@ -41,22 +52,22 @@ async def main():
             system_message="You are a manager and greeter agent. You greet the user, assign work to other agents, and respond back to user when all is saisifed. Please respond with TERMINATE once all done",
         )
 
-        # Create a team with the calculator and greeter agents
-        team = RoundRobinGroupChat([calculator_agent, greeter_agent])
-        
         termination = TextMentionTermination("TERMINATE") | MaxMessageTermination(max_messages=4)
         
+        # Create a team with the calculator and greeter agents
         team = RoundRobinGroupChat([calculator_agent, greeter_agent], termination_condition=termination)
 
-
-        # Define a collaborative task for the team
-        task = """
-        Hellow my name is Jaimon. Can you please help me add 100 and 20.
-
-        """
-
         # Run the task with the team        
         await Console(team.run_stream(task=task))
 
+async def main():
+    # Start the MCP server sessions once and keep them warm across tasks
+    async with McpWorkbenchPool(fetch_mcp_server, size=int(os.getenv("MCP_POOL_SIZE", 1))) as pool:
+        for task in tasks:
+            await run_task(pool, task)
+
+        # Cold start (spawn + handshake) versus warm tool-call latency
+        print(pool.stats())
+
 # Run the async main function
 asyncio.run(main())
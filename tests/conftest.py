@@ -0,0 +1,21 @@
+import os
+import sys
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer
+import pytest
+
+# Tests import the top-level modules, and must not read or fill the real fetch cache
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("FETCH_CACHE_DIR", tempfile.mkdtemp(prefix="fetch-cache-"))
+
+
+@pytest.fixture(scope="session")
+def page_base():
+    """Base URL of a local server with the benchmark's fixture pages (/page/<KB>)."""
+    import bench_e2e
+    server = ThreadingHTTPServer(("localhost", 0), bench_e2e.make_handler())
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://localhost:{server.server_address[1]}"
+    server.shutdown()
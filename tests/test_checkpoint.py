@@ -0,0 +1,59 @@
+import re
+import asyncio
+from autogen_agentchat.messages import ToolCallExecutionEvent
+import bench_e2e
+from async_fetch import fetcher
+from checkpoint import CheckpointStore, Checkpointer
+from mvp import build_task, create_team
+
+
+class FailingClient(bench_e2e.ScriptedChatCompletionClient):
+    """Scripted client whose calls for one agent raise, like a provider outage mid-run."""
+
+    def __init__(self, fail_role: str | None = None):
+        super().__init__()
+        self.fail_role = fail_role
+
+    async def create(self, messages, **kwargs):
+        if self._role(messages) == self.fail_role:
+            raise ConnectionError("provider outage")
+        return await super().create(messages, **kwargs)
+
+
+def test_resume_after_crawler_turn_keeps_stored_documents(tmp_path, page_base):
+    path = str(tmp_path / "checkpoints.db")
+    url = f"{page_base}/page/50"
+
+    async def crash():
+        checkpointer = Checkpointer(CheckpointStore(path))
+        team = create_team(FailingClient("IndexerAgent"), mode="pipeline", checkpointer=checkpointer)
+        checkpointer.begin("run", key=url)
+        try:
+            async for _ in checkpointer.track(team.run_stream(task=build_task(url))):
+                pass
+        except Exception:
+            pass
+        await fetcher.aclose()
+
+    async def resume():
+        # A new store and team, as after a restart
+        checkpointer = Checkpointer(CheckpointStore(path))
+        team = create_team(FailingClient(), mode="pipeline", checkpointer=checkpointer)
+        restored = await checkpointer.restore("run")
+        handle = re.search(r"doc-[0-9a-f]{8}", str(await team.save_state())).group(0)
+        section = checkpointer.documents.section(handle, 0)
+        messages = [m async for m in checkpointer.track(team.run_stream())]
+        await fetcher.aclose()
+        return restored, section, messages
+
+    asyncio.run(crash())
+    assert [run["run_id"] for run in CheckpointStore(path).interrupted()] == ["run"]
+    restored, section, messages = asyncio.run(resume())
+
+    assert restored >= 2
+    assert section.strip()
+    tool_results = [r.content for m in messages if isinstance(m, ToolCallExecutionEvent) for r in m.content]
+    assert tool_results, "the resumed indexer should read the stored page"
+    assert not any("Unknown document handle" in result for result in tool_results)
+    assert messages[-1].stop_reason
+    assert CheckpointStore(path).interrupted() == []
@@ -0,0 +1,29 @@
+from dedup import NearDuplicateIndex, dedup_faqs
+
+URL = "https://example.com/page"
+FAQS = [{"category": "Billing", "questions": [
+    {"question": "How do I pay my invoice?", "answer": "Pay it by card or bank transfer from the billing page."},
+    {"question": "Can I get a refund?", "answer": "Refunds are issued within 14 days of purchase."},
+]}]
+
+
+def test_rerun_of_a_page_keeps_its_pairs():
+    index = NearDuplicateIndex()
+    assert dedup_faqs(FAQS, index, URL) == (FAQS, 0)
+    assert dedup_faqs(FAQS, index, URL) == (FAQS, 0)
+
+
+def test_other_pages_and_repeats_within_a_page_are_dropped():
+    index = NearDuplicateIndex()
+    dedup_faqs(FAQS, index, URL)
+    assert dedup_faqs(FAQS, index, "https://example.com/other") == ([], 2)
+    doubled = [{"category": "Billing", "questions": FAQS[0]["questions"] * 2}]
+    assert dedup_faqs(doubled, NearDuplicateIndex(), URL) == (FAQS, 2)
+
+
+def test_malformed_items_are_skipped():
+    faqs = [None, "junk", {"category": "Empty", "questions": None}, {"category": "Odd", "questions": "text"},
+            {"category": "Partial", "questions": [{"question": None, "answer": "Only an answer here."}]}]
+    kept, dropped = dedup_faqs(faqs, NearDuplicateIndex(), URL)
+    assert dropped == 0
+    assert [item["category"] for item in kept] == ["Partial"]
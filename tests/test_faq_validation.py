@@ -0,0 +1,20 @@
+import json
+from faq_validation import faq_errors
+
+QA = {"question": "What is it?", "answer": "A page."}
+
+
+def test_valid_knowledge_base_passes():
+    assert faq_errors("```json\n" + json.dumps([{"category": "A", "questions": [QA]}]) + "\n```") is None
+
+
+def test_stray_items_make_the_reply_invalid():
+    reply = json.dumps([{"category": "A", "questions": [QA]}, "junk", {"questions": [QA]}])
+    errors = faq_errors(reply)
+    assert errors is not None
+    assert "[1]" in errors and "[2].category" in errors
+
+
+def test_empty_and_unparseable_replies_are_invalid():
+    assert faq_errors("[]") is not None
+    assert faq_errors("No JSON here") is not None
@@ -0,0 +1,26 @@
+import json
+from knowledge_base import KnowledgeBase
+
+QA = {"question": "What is it?", "answer": "A page."}
+
+
+def test_removed_source_drops_out_of_compaction(tmp_path):
+    kb = KnowledgeBase(str(tmp_path / "kb.jsonl"))
+    kb.append("file:///a.md", [{"category": "A", "questions": [QA]}])
+    kb.append("file:///b.md", [{"category": "B", "questions": [QA]}])
+    kb.remove("file:///a.md")
+    output = tmp_path / "kb.json"
+    assert kb.compact(str(output)) == 1
+    assert [entry["category"] for entry in json.loads(output.read_text())] == ["B"]
+    assert [r["source"] for r in kb.iter_records(latest_only=True)] == ["file:///b.md"]
+    assert len(kb.by_source("file:///a.md")) == 1
+
+
+def test_reopening_after_a_removal_does_not_reindex(tmp_path):
+    path = str(tmp_path / "kb.jsonl")
+    kb = KnowledgeBase(path)
+    kb.append("file:///a.md", [{"category": "A", "questions": [QA]}])
+    kb.remove("file:///a.md")
+    KnowledgeBase(path)
+    with open(f"{path}.idx", encoding="utf-8") as f:
+        assert len(f.readlines()) == 2
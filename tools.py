@@ -0,0 +1,21 @@
+import os
+import re
+from fetch_cache import FetchCache
+from extract import DEFAULT_MAX_BYTES, DEFAULT_MAX_CHARS
+
+REQUEST_HEADERS = {"User-Agent": os.getenv("USER_AGENT", "Mozilla/5.0 (compatible; FAQ-Builder/1.0)")}
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", DEFAULT_MAX_BYTES))
+FETCH_MAX_CHARS = int(os.getenv("FETCH_MAX_CHARS", DEFAULT_MAX_CHARS))
+
+# Shared on-disk cache of cleaned page text
+fetch_cache = FetchCache(
+    directory=os.getenv("FETCH_CACHE_DIR", ".cache/fetch"),
+    ttl=float(os.getenv("FETCH_CACHE_TTL", 24 * 3600)),
+    max_bytes=int(os.getenv("FETCH_CACHE_MAX_BYTES", 256 * 1024 * 1024)),
+)
+
+
+def clean_text(text: str) -> str:
+    """Remove unnecessary characters and whitespace."""
+    return re.sub(r'\s+', ' ', text).strip()
+